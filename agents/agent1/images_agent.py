@@ -1,16 +1,71 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langchain_core.prompts import ChatPromptTemplate
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 import os
 import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 llm = ChatGoogleGenerativeAI(
     model="gemini-2.0-flash",
     api_key=os.getenv("GEMINI_API_KEY"),
 )
 
+# Shared HTTP session so the searches and downloads reuse pooled keep-alive connections,
+# retrying on rate limits and transient server errors
+session = requests.Session()
+# Use a common User-Agent header to mimic a real browser
+session.headers["User-Agent"] = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                                 "AppleWebKit/537.36 (KHTML, like Gecko) "
+                                 "Chrome/103.0.5060.114 Safari/537.36")
+adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # Hand the last response back instead of raising, so callers still see its status code
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+# Fallback pattern for jpg URLs in the raw search results HTML, compiled once per process
+JPG_URL_PATTERN = re.compile(r'["\'](https?://[^"\']+?\.jpg)["\']')
+
+# Search terms and image search results are kept here by a hash of their inputs, so reruns
+# on the same script skip the Gemini and Google round trips
+SEARCH_CACHE_DIR = "output/images/search_cache"
+SEARCH_CACHE_TTL = 24 * 60 * 60  # Seconds; image search results go stale after a while
+
+def search_cache_path(kind, payload):
+    """Return the cache file for a `kind` lookup with these inputs."""
+    key = hashlib.sha256(json.dumps([kind, payload], sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(SEARCH_CACHE_DIR, f"{kind}_{key}.json")
+
+def load_cached_result(kind, payload):
+    """Return the cached result of a `kind` lookup, or None if it was never stored or has expired."""
+    cache_path = search_cache_path(kind, payload)
+    if not os.path.exists(cache_path) or time.time() - os.path.getmtime(cache_path) >= SEARCH_CACHE_TTL:
+        return None
+    with open(cache_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_cached_result(kind, payload, result):
+    """Store the result of a `kind` lookup for later runs."""
+    os.makedirs(SEARCH_CACHE_DIR, exist_ok=True)
+    cache_path = search_cache_path(kind, payload)
+    # Write to a per-thread temporary file first so an interrupted run never leaves a truncated
+    # cache entry and concurrent identical lookups don't clobber each other's writes
+    temp_path = f"{cache_path}.{threading.get_ident()}.part"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(temp_path, cache_path)
+
 
 def timestamp_to_seconds(timestamp: str) -> float:
     """Convert a timestamp string (HH:MM:SS or MM:SS) to seconds."""
@@ -81,25 +136,24 @@ def generate_images(state):
     
         # Create Google image search function
     def fetch_image_urls(query, num_images=1):
+        # Reuse the URLs found for this exact query on an earlier run
+        cache_payload = {"query": query, "num_images": num_images}
+        cached_urls = load_cached_result("image_urls", cache_payload)
+        if cached_urls is not None:
+            return cached_urls
+        
         # Prepare keywords for URL encoding
         query_for_url = query.replace(" ", "+")
         url = f"https://www.google.com/search?q={query_for_url}&tbm=isch"
         
-        # Use a common User-Agent header to mimic a real browser
-        headers = {
-            "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                           "AppleWebKit/537.36 (KHTML, like Gecko) "
-                           "Chrome/103.0.5060.114 Safari/537.36")
-        }
-        
         # Fetch the search result page
-        response = requests.get(url, headers=headers)
+        response = session.get(url, timeout=10)
         if response.status_code != 200:
             print(f"Request failed with status code {response.status_code}")
             return []
         
-        # Parse the page using BeautifulSoup
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Parse the page using BeautifulSoup, only building tree nodes for the <img> tags we read
+        soup = BeautifulSoup(response.text, "html.parser", parse_only=SoupStrainer("img"))
         image_urls = []
         
         # First approach: look for <img> tags with src containing http
@@ -112,13 +166,18 @@ def generate_images(state):
 
         # Fallback: use regex to extract jpg URLs from the raw HTML if not enough URLs found
         if len(image_urls) < num_images:
-            regex_urls = re.findall(r'["\'](https?://[^"\']+?\.jpg)["\']', response.text)
+            regex_urls = JPG_URL_PATTERN.findall(response.text)
             for url in regex_urls:
                 if url not in image_urls:
                     image_urls.append(url)
                 if len(image_urls) >= num_images:
                     break
-        return image_urls[:num_images]
+        
+        # Empty results aren't cached, so the next run searches again
+        image_urls = image_urls[:num_images]
+        if image_urls:
+            save_cached_result("image_urls", cache_payload, image_urls)
+        return image_urls
     
     
     # Ensure output directory exists
@@ -143,10 +202,24 @@ def generate_images(state):
     # Create chain for search term generation
     search_chain = search_prompt | llm | StrOutputParser()
     
-    images_manifest = []
-    for i, segment in enumerate(state["script"]["videoScript"]):
-        # Generate search term for this segment
-        search_term = search_chain.invoke({"segment_text": segment['text'], "topic": state["topic"]})
+    # Generate the search terms for all segments up front, reusing any cached from earlier runs;
+    # batch() sends the remaining prompts concurrently
+    segments = state["script"]["videoScript"]
+    search_inputs = [{"segment_text": segment['text'], "topic": state["topic"]} for segment in segments]
+    # Key each term on the model and the fully rendered prompt, so edits to the prompt text aren't served stale terms
+    cache_payloads = [
+        {"model": llm.model, "prompt": search_prompt.format(**search_input)}
+        for search_input in search_inputs
+    ]
+    search_terms = [load_cached_result("search_term", cache_payload) for cache_payload in cache_payloads]
+    missing = [i for i, search_term in enumerate(search_terms) if search_term is None]
+    if missing:
+        generated_terms = search_chain.batch([search_inputs[i] for i in missing], config={"max_concurrency": 8})
+        for i, search_term in zip(missing, generated_terms):
+            save_cached_result("search_term", cache_payloads[i], search_term)
+            search_terms[i] = search_term
+    
+    def process_segment(i, segment, search_term):
         search_term = search_term.strip() + " vertical high quality"
         print(f"Generated search term: {search_term}")
         
@@ -163,37 +236,42 @@ def generate_images(state):
             # Download the image
             image_path = f"output/images/segment_{i+1}.jpg"
             try:
-                response = requests.get(image_urls[0], timeout=10)
+                response = session.get(image_urls[0], timeout=10)
                 response.raise_for_status()
                 
                 with open(image_path, "wb") as f:
                     f.write(response.content)
                 print(f"Downloaded image for segment {i+1} to {image_path}")
                 
-                images_manifest.append({
+                return {
                     "start": segment["start"],
                     "duration": segment["duration"],
                     "text": segment["text"],
                     "url": image_path  # Store local path instead of URL
-                })
+                }
             except Exception as e:
                 print(f"Failed to download image for segment {i+1}: {str(e)}")
                 # Use a placeholder or fallback image
-                images_manifest.append({
+                return {
                     "start": segment["start"],
                     "duration": segment["duration"],
                     "text": segment["text"],
                     "url": "output/images/placeholder.jpg"  # Default placeholder
-                })
+                }
         else:
             print(f"No images found for segment {i+1}, using placeholder")
             # Use placeholder
-            images_manifest.append({
+            return {
                 "start": segment["start"],
                 "duration": segment["duration"],
                 "text": segment["text"],
                 "url": "output/images/placeholder.jpg"
-            })
+            }
+    
+    # Search for and download every segment's image concurrently; each one mostly waits on the network.
+    # map() keeps the manifest in segment order
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        images_manifest = list(executor.map(process_segment, range(len(segments)), segments, search_terms))
     
     print("Images manifest:", images_manifest)
     return {"images_manifest": images_manifest}
@@ -72,12 +72,16 @@ workflow.add_node("avatar_video_agent", avatar_video_agent)
 workflow.add_node("video_agent", video_agent)
 
 workflow.set_entry_point("transcript_agent")
+# The metadata and thumbnail branch runs alongside the audio branch, since neither reads the other's output
 workflow.add_edge("transcript_agent", "title_desc_agent")
 workflow.add_edge("title_desc_agent", "thumbnail_agent")
-workflow.add_edge("thumbnail_agent", "audio_agent")
+workflow.add_edge("transcript_agent", "audio_agent")
+# Images follow the script re-segmented from the audio and the avatar needs the audio file,
+# so both start once the audio is ready and run in parallel
 workflow.add_edge("audio_agent", "images_agent")
-workflow.add_edge("images_agent", "avatar_video_agent")
-workflow.add_edge("avatar_video_agent", "video_agent")
+workflow.add_edge("audio_agent", "avatar_video_agent")
+# Wait for every branch before composing the final video
+workflow.add_edge(["thumbnail_agent", "images_agent", "avatar_video_agent"], "video_agent")
 workflow.add_edge("video_agent", END)
 
 app = workflow.compile()
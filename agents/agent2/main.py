@@ -1,7 +1,12 @@
 # youtube_ai.py
 import os
 import json
+import time
+import hashlib
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from typing import TypedDict, List, Annotated
 from dotenv import load_dotenv
@@ -13,14 +18,13 @@ from langgraph.graph import END, StateGraph
 from elevenlabs.client import ElevenLabs
 from elevenlabs import play, VoiceSettings
 import fal_client as fal
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.video.VideoClip import ImageClip, TextClip
-from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
-from moviepy.audio.io.AudioFileClip import AudioFileClip
-from moviepy import vfx
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from imageio_ffmpeg import get_ffmpeg_exe
 import base64
-from PIL import ImageFont
-import matplotlib.font_manager as fm
+from io import BytesIO
+import numpy as np
 
 load_dotenv()
 
@@ -42,6 +46,47 @@ llm = ChatGoogleGenerativeAI(
     api_key=os.getenv("GEMINI_API_KEY"),
 )
 parser = JsonOutputParser()
+# Shared HTTP session so downloads reuse pooled connections across threads,
+# retrying idempotent requests on transient gateway errors
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+# External call results are kept here by a hash of their inputs, so reruns on the same
+# topic skip the search, LLM and image generation round trips
+CACHE_DIR = "output/cache"
+CACHE_TTL = 24 * 60 * 60  # Seconds; fal image URLs and search results go stale after a while
+
+def cached_call(kind, payload, compute):
+    """Return the cached result of a `kind` call with these inputs, running compute() on a miss."""
+    key = hashlib.sha256(json.dumps([kind, payload], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"{kind}_{key}.json")
+    if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < CACHE_TTL:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    result = compute()
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a per-thread temporary file first so an interrupted run never leaves a truncated
+    # cache entry and concurrent identical calls don't clobber each other's writes
+    temp_path = f"{cache_path}.{threading.get_ident()}.part"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(temp_path, cache_path)
+    return result
+
+def llm_cache_payload(prompt, inputs):
+    """Return what an LLM chain's result depends on: the model and the fully rendered prompt."""
+    # Rendering the template covers edits to the prompt text as well as changes to its inputs
+    return {"model": llm.model, "prompt": prompt.format(**inputs)}
+
+def run_fast_sdxl(arguments):
+    """Run fal's fast-sdxl model, reusing the result for identical arguments."""
+    return cached_call("fast_sdxl", arguments, lambda: fal.run("fal-ai/fast-sdxl", arguments=arguments))
 
 # 3. Define Agents
 def research_and_generate_transcript(state: AgentState):
@@ -49,7 +94,7 @@ def research_and_generate_transcript(state: AgentState):
     topic = state["topic"]
     
     # Web research
-    tavily_results = tavily.invoke({"query": topic})
+    tavily_results = cached_call("tavily", {"query": topic}, lambda: tavily.invoke({"query": topic}))
     
     # Generate script
     script_prompt = ChatPromptTemplate.from_template(
@@ -70,35 +115,8 @@ def research_and_generate_transcript(state: AgentState):
         - Avoid any formatting symbols or special characters
         - Sound authentic and human-like
         - The text key in the json response should only contain the text 
-
-        Format JSON exactly(The output response should be exactly like this):
-        {{
-            "videoScript": [
-                {{
-                    "start": "00:00",
-                    "duration": "00:02",
-                    "text": "Hey guys! You won't believe what I discovered..."
-                }},
-                ...
-            ],
-            "totalDuration": "00:30"
-        }}"""
-    )
-    chain = script_prompt | llm | parser
-    script = chain.invoke({
-        "topic": topic,
-        "research": f"Research: {tavily_results}"
-    })
-    print("Script generated:", script)
-    return {"script": script}
-
-def generate_title_description(state: AgentState):
-    print("Generating title and description...")
-    prompt = ChatPromptTemplate.from_template(
-        """Generate compelling YouTube Shorts metadata for this script:
-        {script}
         
-        Follow these guidelines:
+        Also generate compelling YouTube Shorts metadata for the script:
         1. Title must:
            - Start with a powerful action word or number
            - Include trending keywords
@@ -112,17 +130,33 @@ def generate_title_description(state: AgentState):
            - Use strategic emojis
            - Add a clear call-to-action
            - Stay under 200 characters
-        
-        Return JSON with(The output response should be exactly like this):
+
+        Format JSON exactly(The output response should be exactly like this):
         {{
+            "videoScript": [
+                {{
+                    "start": "00:00",
+                    "duration": "00:02",
+                    "text": "Hey guys! You won't believe what I discovered..."
+                }},
+                ...
+            ],
+            "totalDuration": "00:30",
             "title": "Catchy title under 60 chars",
             "description": "Engaging description with emojis (200 chars)"
         }}"""
     )
-    chain = prompt | llm | parser
-    metadata = chain.invoke({"script": state["script"]})
-    print("Metadata generated:", metadata)
-    return {"title": metadata["title"], "description": metadata["description"]}
+    chain = script_prompt | llm | parser
+    inputs = {
+        "topic": topic,
+        "research": f"Research: {tavily_results}"
+    }
+    # The script and its title and description come back from a single Gemini call
+    result = cached_call("script_metadata", llm_cache_payload(script_prompt, inputs), lambda: chain.invoke(inputs))
+    script = {"videoScript": result["videoScript"], "totalDuration": result["totalDuration"]}
+    print("Script generated:", script)
+    print("Metadata generated:", {"title": result["title"], "description": result["description"]})
+    return {"script": script, "title": result["title"], "description": result["description"]}
 
 def generate_thumbnail(state: AgentState):
     print("Generating thumbnail...")
@@ -137,14 +171,11 @@ def generate_thumbnail(state: AgentState):
     - Clean composition with clear focal point
     - Professional quality finish"""
     
-    result = fal.run(
-        "fal-ai/fast-sdxl",
-        arguments={
-            "prompt": prompt_text,
-            "negative_prompt": "text, watermark, blurry, low quality, distorted, amateur, poorly lit",
-            "image_size": {"width": 1080, "height": 1920}
-        }
-    )
+    result = run_fast_sdxl({
+        "prompt": prompt_text,
+        "negative_prompt": "text, watermark, blurry, low quality, distorted, amateur, poorly lit",
+        "image_size": {"width": 1080, "height": 1920}
+    })
     return {"thumbnail_url": result["images"][0]["url"]}
 
 def format_transcript(response):
@@ -153,33 +184,29 @@ def format_transcript(response):
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
     
-    video_script = []
-    current_text = ""
-    segment_start = 0
     chars = response["normalized_alignment"]["characters"]
-    start_times = response["normalized_alignment"]["character_start_times_seconds"]
-    end_times = response["normalized_alignment"]["character_end_times_seconds"]
-    
-    for i in range(len(chars)):
-        current_text += chars[i]
-        if i + 1 < len(chars) and start_times[i + 1] - start_times[i] > 0.5:
-            duration = end_times[i] - segment_start
-            video_script.append({
-                "start": format_time(segment_start),
-                "duration": format_time(duration),
-                "text": current_text.strip()
-            })
-            segment_start = start_times[i + 1]
-            current_text = ""
-    
-    # Add the last segment
-    if current_text:
-        duration = end_times[-1] - segment_start
-        video_script.append({
+    start_times = np.asarray(response["normalized_alignment"]["character_start_times_seconds"], dtype=np.float64)
+    end_times = np.asarray(response["normalized_alignment"]["character_end_times_seconds"], dtype=np.float64)
+    
+    # A pause of more than half a second before a character starts a new segment
+    boundaries = np.flatnonzero(np.diff(start_times) > 0.5) + 1
+    first_chars = np.concatenate(([0], boundaries))
+    last_chars = np.concatenate((boundaries, [len(chars)])) - 1
+    segment_starts = start_times[first_chars]
+    segment_starts[0] = 0  # The first segment always starts at the beginning of the audio
+    durations = end_times[last_chars] - segment_starts
+    
+    # Only the per-segment string joins are left in Python
+    video_script = [
+        {
             "start": format_time(segment_start),
             "duration": format_time(duration),
-            "text": current_text.strip()
-        })
+            "text": "".join(chars[first:last + 1]).strip()
+        }
+        for first, last, segment_start, duration in zip(
+            first_chars.tolist(), last_chars.tolist(), segment_starts.tolist(), durations.tolist()
+        )
+    ]
     
     total_duration = end_times[-1]
     return {"videoScript": video_script, "totalDuration": format_time(total_duration)}
@@ -227,6 +254,23 @@ def generate_audio(state: AgentState):
     print(f"{audio_path}: Audio file saved successfully!")
     return {"audio_path": audio_path, "script": formatted_transcript}
 
+def generate_segment_image(segment):
+    """Generate the image for one combined script segment and return its URL."""
+    image_result = run_fast_sdxl({
+        "prompt": f"""Video scene for YouTube Shorts: {segment['text']}
+        Style requirements:
+        - Vertical cinematic composition
+        - Professional lighting with dramatic contrast
+        - Vibrant, eye-catching colors
+        - Clean, uncluttered background
+        - Modern and trendy aesthetic
+        - Emotionally engaging visuals""",
+        "negative_prompt": "text, watermark, blurry, low quality, distorted, amateur, poorly lit, busy background",
+        "image_size": {"width": 1080, "height": 1920}
+    })
+    print(f"Generated image for combined segment starting at {segment['start']}")
+    return image_result["images"][0]["url"]
+
 def generate_images(state: AgentState):
     print("Generating images...")
     
@@ -257,37 +301,31 @@ def generate_images(state: AgentState):
     combine_chain = combine_prompt | llm | parser
     
     # Get optimized script with combined segments
-    result = combine_chain.invoke({"segments": state["script"]["videoScript"]})
-    
-    images_manifest = []
-    for segment in result["videoScript"]:
-        image_result = fal.run(
-            "fal-ai/fast-sdxl",
-            arguments={
-                "prompt": f"""Video scene for YouTube Shorts: {segment['text']}
-                Style requirements:
-                - Vertical cinematic composition
-                - Professional lighting with dramatic contrast
-                - Vibrant, eye-catching colors
-                - Clean, uncluttered background
-                - Modern and trendy aesthetic
-                - Emotionally engaging visuals""",
-                "negative_prompt": "text, watermark, blurry, low quality, distorted, amateur, poorly lit, busy background",
-                "image_size": {"width": 1080, "height": 1920}
-            }
-        )
-        
-        images_manifest.append({
+    inputs = {"segments": state["script"]["videoScript"]}
+    result = cached_call("combined_script", llm_cache_payload(combine_prompt, inputs), lambda: combine_chain.invoke(inputs))
+    
+    # Generate every segment's image concurrently; each fal call is mostly remote inference time
+    segments = result["videoScript"]
+    with ThreadPoolExecutor(max_workers=max(1, len(segments))) as executor:
+        image_urls = list(executor.map(generate_segment_image, segments))
+    
+    images_manifest = [
+        {
             "start": segment["start"],
             "duration": segment["duration"],
+            # Parsed once here so the video step reads the timings as numbers
+            "start_sec": timestamp_to_seconds(segment["start"]),
+            "duration_sec": timestamp_to_seconds(segment["duration"]),
             "text": segment["text"],
-            "url": image_result["images"][0]["url"]
-        })
-        print(f"Generated image for combined segment starting at {segment['start']}")
+            "url": image_url
+        }
+        for segment, image_url in zip(segments, image_urls)
+    ]
     
     print("Images manifest:", images_manifest, "Modified Script:", result)
     return {"images_manifest": images_manifest, "script": result}
 
+@lru_cache(maxsize=256)
 def timestamp_to_seconds(timestamp: str) -> float:
     """Convert a timestamp string (HH:MM:SS or MM:SS) to seconds."""
     parts = timestamp.split(":")
@@ -303,8 +341,9 @@ def timestamp_to_seconds(timestamp: str) -> float:
         except ValueError:
             raise ValueError(f"Invalid timestamp format: {timestamp}")
 
+@lru_cache(maxsize=1)
 def get_system_font():
-    """Get a suitable system font path."""
+    """Get a suitable system font path, looked up once per process."""
     # Try common system fonts in order of preference
     font_candidates = [
         'Arial.ttf',
@@ -314,25 +353,98 @@ def get_system_font():
         '/System/Library/Fonts/SF-Pro-Text-Regular.otf'
     ]
     
-    # Get all system fonts
-    system_fonts = fm.findSystemFonts()
-    
     # First try the candidates
     for font in font_candidates:
         if os.path.exists(font):
             return font
     
+    # Only scan every font directory when none of the candidates exist.
+    # Imported here since loading the font manager is slow and only this fallback needs it
+    import matplotlib.font_manager as fm
+    system_fonts = fm.findSystemFonts()
+    
     # If none of the candidates work, use the first available system font
     if system_fonts:
         return system_fonts[0]
     
     raise ValueError("No suitable font found on the system")
 
+# Frame size of the final Short, in pixels
+VIDEO_SIZE = (1080, 1920)
+
+def download_image(url, temp_file):
+    """Download an image into a temporary file, resized to the video frame if needed."""
+    response = session.get(url, timeout=10)
+    response.raise_for_status()
+    
+    # fal already renders at the frame size, so this only parses the header from memory;
+    # anything else is resized here, so each image is written to disk exactly once
+    from PIL import Image
+    with Image.open(BytesIO(response.content)) as img:
+        if img.size != VIDEO_SIZE:
+            img.convert("RGB").resize(VIDEO_SIZE, Image.LANCZOS).save(temp_file, "JPEG", quality=90)
+            return
+    
+    # Save the image data
+    with open(temp_file, "wb") as f:
+        f.write(response.content)
+
+def seconds_to_srt_time(seconds: float) -> str:
+    """Convert seconds to an SRT timestamp (HH:MM:SS,mmm)."""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def write_captions_srt(video_script, srt_path):
+    """Write the script segments as an SRT file for ffmpeg's subtitles filter."""
+    with open(srt_path, "w", encoding="utf-8") as f:
+        for index, seg in enumerate(video_script, start=1):
+            start_time = timestamp_to_seconds(seg["start"])
+            end_time = start_time + timestamp_to_seconds(seg["duration"])
+            f.write(f"{index}\n{seconds_to_srt_time(start_time)} --> {seconds_to_srt_time(end_time)}\n{seg['text']}\n\n")
+
+# Length of the crossfade between consecutive images, in seconds
+FADE_DURATION = 0.5
+
+def crossfade_durations(image_durations):
+    """Return the length of each crossfade, shortened where an image is on screen for less than a full fade."""
+    return [min(FADE_DURATION, previous, current) for previous, current in zip(image_durations, image_durations[1:])]
+
+def build_video_filter(image_durations, srt_path, font_path):
+    """Build the filtergraph that crossfades the images, burns in the captions and holds the last frame."""
+    # The stills are already at the frame size, so only convert them to the format xfade needs on both of its inputs
+    filters = [
+        f"[{i}:v]setsar=1,format=yuv420p[v{i}]"
+        for i in range(len(image_durations))
+    ]
+    
+    # Chain xfade filters so each transition ends exactly when the next image is due
+    previous = "[v0]"
+    offset = 0
+    for i, fade in enumerate(crossfade_durations(image_durations), start=1):
+        offset += image_durations[i - 1]
+        filters.append(f"{previous}[v{i}]xfade=transition=fade:duration={fade:.3f}:offset={offset - fade:.3f}[x{i}]")
+        previous = f"[x{i}]"
+    
+    # White captions centered on the frame, sized in output pixels
+    from PIL import ImageFont
+    font_name = ImageFont.truetype(font_path, 40).getname()[0]
+    caption_style = (f"PlayResX=1080,PlayResY=1920,Fontname={font_name},Fontsize=40,"
+                     "PrimaryColour=&H00FFFFFF,Outline=0,Shadow=0,Alignment=10,MarginL=0,MarginR=0")
+    
+    # Draw the captions, then repeat the last frame so the audio decides where the video ends
+    filters.append(
+        f"{previous}subtitles=filename='{srt_path}':fontsdir='{os.path.dirname(font_path)}':force_style='{caption_style}',"
+        "tpad=stop=-1:stop_mode=clone[video]"
+    )
+    return ";".join(filters)
+
 def create_video(state: AgentState):
     print("Creating final video...")
     print("State from create_video node: ", state)
     
-    clips = []
     temp_image_files = []
     
     # Get system font path
@@ -350,159 +462,95 @@ def create_video(state: AgentState):
     if not state.get("script", {}).get("videoScript"):
         raise ValueError("script.videoScript is required in state")
     
+    for seg in state["script"]["videoScript"]:
+        if not seg.get("text") or not seg.get("start") or not seg.get("duration"):
+            raise ValueError(f"Invalid script segment: {seg}")
+    
+    srt_path = f"output/captions_{datetime.now().timestamp()}.srt"
+    
     try:
-        # Download assets
-        audio = AudioFileClip(state["audio_path"])
-        
-        # Download and save images temporarily
+        # Validate the manifest and collect the timings generate_images already parsed;
+        # manifests from saved states or other agents may only carry the timestamp strings
+        image_times = []
         for img in state["images_manifest"]:
             if not img.get("url") or not img.get("start") or not img.get("duration"):
                 raise ValueError(f"Invalid image manifest entry: {img}")
-                
-            response = requests.get(img["url"], stream=True, timeout=10)
-            response.raise_for_status()
-            
-            # Create a temporary file with .jpg extension
-            temp_file = f"output/temp_img_{len(temp_image_files)}.jpg"
-            temp_image_files.append(temp_file)
-            
-            # Save the image data
-            with open(temp_file, "wb") as f:
-                f.write(response.content)
-            
-            try:
-                # Convert timestamp strings to seconds
-                start_time = timestamp_to_seconds(img["start"])
-                duration = timestamp_to_seconds(img["duration"])
-                
-                # Create clip from saved image
-                clip = (ImageClip(temp_file)
-                       .resized((1080, 1920))
-                       .with_start(start_time)
-                       .with_duration(duration))
-                clips.append(clip)
-            except Exception as e:
-                raise ValueError(f"Failed to create clip from image {img['url']}: {str(e)}")
+            image_times.append((
+                img["start_sec"] if "start_sec" in img else timestamp_to_seconds(img["start"]),
+                img["duration_sec"] if "duration_sec" in img else timestamp_to_seconds(img["duration"])
+            ))
         
-        if not clips:
-            raise ValueError("No valid clips were created from the images")
-            
-        # Fix crossfading between image clips
-        if len(clips) > 1:
-            final_clips = []
-            for i in range(len(clips)):
-                current_clip = clips[i]
-                effects = []
-                if i > 0:  # Add fade in for all clips except first
-                    effects.append(vfx.FadeIn(0.5))
-                if i < len(clips) - 1:  # Add fade out for all clips except last
-                    effects.append(vfx.FadeOut(0.5))
-                if effects:
-                    current_clip = current_clip.with_effects(effects)
-                final_clips.append(current_clip)
-            clips = final_clips
+        # Download and save images temporarily, fetching them concurrently since each one just waits on the network
+        urls = [img["url"] for img in state["images_manifest"]]
+        temp_image_files.extend(f"output/temp_img_{i}.jpg" for i in range(len(urls)))
+        with ThreadPoolExecutor(max_workers=min(8, len(urls))) as executor:
+            list(executor.map(download_image, urls, temp_image_files))
         
-        # Create text overlays
-        text_clips = []
-        for seg in state["script"]["videoScript"]:
-            if not seg.get("text") or not seg.get("start") or not seg.get("duration"):
-                raise ValueError(f"Invalid script segment: {seg}")
-                
-            try:
-                start_time = timestamp_to_seconds(seg["start"])
-                duration = timestamp_to_seconds(seg["duration"])
-                
-                # Create text clip with position included in initialization
-                text_clip = TextClip(
-                    text=seg["text"],
-                    font=font_path,
-                    font_size=40,
-                    color='white',
-                    size=(1080, 1920),
-                    method='caption',
-                ).with_position(('bottom')).with_duration(duration)
-
-                # text_clip = text_clip.with_position(('center', 'bottom'))
-                
-                # Only apply timing
-                text_clip = text_clip.with_start(start_time).with_duration(duration)
-                
-                text_clips.append(text_clip)
-            except Exception as e:
-                raise ValueError(f"Failed to create text clip for segment: {seg['text']}: {str(e)}")
+        # Each image stays up until the next one starts, so the stills never drift from the captions
+        image_durations = []
+        for i, (start_time, duration) in enumerate(image_times):
+            if i + 1 < len(image_times):
+                duration = image_times[i + 1][0] - start_time
+            image_durations.append(max(duration, 1 / 24))
+        
+        # Captions are burned in by ffmpeg from an SRT file instead of one TextClip per segment
+        write_captions_srt(state["script"]["videoScript"], srt_path)
+        
+        output_path = f"output/video_output_{datetime.now().timestamp()}.mp4"
+        
+        # One ffmpeg run composes the stills, captions and audio in native code instead of MoviePy's per-frame Python loop
+        command = [get_ffmpeg_exe(), "-y", "-loglevel", "error"]
+        # Every image after the first also covers the crossfade into it, which keeps the overall timing unchanged
+        fade_ins = [0] + crossfade_durations(image_durations)
+        for temp_file, duration, fade_in in zip(temp_image_files, image_durations, fade_ins):
+            command += ["-loop", "1", "-framerate", "24", "-t", f"{duration + fade_in:.3f}", "-i", temp_file]
+        command += [
+            "-i", state["audio_path"],
+            "-filter_complex", build_video_filter(image_durations, srt_path, font_path),
+            "-map", "[video]", "-map", f"{len(temp_image_files)}:a",
+            # The video is padded indefinitely, so the audio sets the final duration
+            "-shortest", "-fflags", "+shortest", "-max_interleave_delta", "100M",
+            "-r", "24",
+            # The frames are mostly unchanged stills, which need far less encoder effort than camera footage
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "stillimage", "-crf", "23",
+            "-threads", str(os.cpu_count() or 1), "-pix_fmt", "yuv420p",
+            # A single keyframe with no scene-cut detection, so the stills become cheap zero-motion P-frames
+            "-g", "9999", "-bf", "0", "-x264-params", "scenecut=0",
+            "-c:a", "aac",
+            output_path
+        ]
         
-        if not text_clips:
-            raise ValueError("No valid text clips were created")
-            
-        # Fix video composition with audio
         try:
-            all_clips = clips + text_clips
-            
-            # Create composite and properly set audio
-            video = CompositeVideoClip(all_clips, size=(1080, 1920))
-            
-            # Ensure video duration matches audio
-            video = video.with_duration(audio.duration)
-            
-            # Create final video with audio
-            final_video = video.with_audio(audio)
-            
-            output_path = f"output/video_output_{datetime.now().timestamp()}.mp4"
-            
-            # Write with explicit audio parameters
-            final_video.write_videofile(
-                output_path,
-                fps=24,
-                codec="libx264",
-                audio_codec="aac",
-                audio=True,  # Ensure audio is included
-                threads=4,
-                preset='medium'
-            )
-            
-            return {"final_video_path": output_path}
-            
-        except Exception as e:
-            raise ValueError(f"Failed to compose final video: {str(e)}")
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"Failed to compose final video: {e.stderr.strip()}")
+        
+        return {"final_video_path": output_path}
             
     finally:
         # Clean up temporary files
-        for temp_file in temp_image_files:
+        for temp_file in temp_image_files + [srt_path]:
             try:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
             except Exception as e:
                 print(f"Warning: Failed to remove temporary file {temp_file}: {e}")
-                
-        # Clean up MoviePy clips
-        try:
-            if 'final_video' in locals():
-                final_video.close()
-            if 'video' in locals():
-                video.close()
-            audio.close()
-            for clip in clips:
-                clip.close()
-            for clip in text_clips:
-                clip.close()
-        except Exception as e:
-            print(f"Warning: Failed to clean up some MoviePy clips: {e}")
 
 # 4. Build Workflow
 workflow = StateGraph(AgentState)
 
 workflow.add_node("research_transcript", research_and_generate_transcript)
-workflow.add_node("title_description", generate_title_description)
 workflow.add_node("generate_thumbnail", generate_thumbnail)
 workflow.add_node("generate_audio", generate_audio)
 workflow.add_node("generate_images", generate_images)
 workflow.add_node("create_video", create_video)
 
 workflow.set_entry_point("research_transcript")
-workflow.add_edge("research_transcript", "title_description")
-workflow.add_edge("title_description", "generate_thumbnail")
-workflow.add_edge("generate_thumbnail", "generate_audio")
-workflow.add_edge("generate_audio", "generate_images")
+# The thumbnail and the audio only need the script and metadata, so they run in parallel branches
+workflow.add_edge("research_transcript", "generate_thumbnail")
+workflow.add_edge("research_transcript", "generate_audio")
+# Wait for both branches before generating the images
+workflow.add_edge(["generate_thumbnail", "generate_audio"], "generate_images")
 workflow.add_edge("generate_images", "create_video")
 workflow.add_edge("create_video", END)
 
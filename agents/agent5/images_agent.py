@@ -5,12 +5,36 @@ from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 import os
 import re
+import hashlib
+import shutil
 
 llm = ChatGoogleGenerativeAI(
     model="gemini-2.0-flash",
     api_key=os.getenv("GEMINI_API_KEY"),
 )
 
+# Downloaded images are stored here by URL hash so reruns skip the network
+IMAGE_CACHE_DIR = "output/images/cache"
+
+def download_image(url, image_path):
+    """Download an image to image_path, reusing the cached copy if this URL was fetched before."""
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    cached_path = os.path.join(IMAGE_CACHE_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}.jpg")
+    
+    if os.path.exists(cached_path):
+        print(f"Using cached image for {url}")
+    else:
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        
+        # Write to a temporary file first so a failed download never leaves a partial cache entry
+        temp_path = f"{cached_path}.part"
+        with open(temp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(temp_path, cached_path)
+    
+    shutil.copyfile(cached_path, image_path)
+
 def generate_images(state):
     print("Generating images...")
 
@@ -99,11 +123,7 @@ def generate_images(state):
             # Download the image
             image_path = f"assets/images/{i+1}.jpg"
             try:
-                response = requests.get(image_urls[0], timeout=10)
-                response.raise_for_status()
-                
-                with open(image_path, "wb") as f:
-                    f.write(response.content)
+                download_image(image_urls[0], image_path)
                 print(f"Downloaded image for segment {i+1} to {image_path}")
                 
                 images_manifest.append({
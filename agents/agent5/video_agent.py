@@ -1,15 +1,55 @@
 import os
+import json
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from datetime import datetime
+from functools import lru_cache
 from moviepy.editor import (
-    AudioFileClip, TextClip, CompositeVideoClip, ColorClip, ImageClip,
-    concatenate_audioclips, CompositeAudioClip, VideoFileClip
+    AudioFileClip, CompositeVideoClip, ColorClip, ImageClip,
+    VideoFileClip, ImageSequenceClip, VideoClip
 )
+from moviepy.config import get_setting
+from PIL import Image, ImageDraw, ImageFont
 import matplotlib.font_manager as fm
 import re
 
+# Hardware H.264 encoders in order of preference, with the ffmpeg params tuned for each
+HARDWARE_ENCODERS = {
+    "h264_nvenc": ['-preset', 'p4', '-tune', 'hq', '-rc', 'vbr', '-cq', '23', '-b:v', '0'],
+    "h264_videotoolbox": ['-b:v', '8M'],
+    "h264_qsv": ['-global_quality', '23'],
+}
+
+@lru_cache(maxsize=1)
+def detect_hardware_encoder():
+    """Return the first hardware H.264 encoder available in MoviePy's ffmpeg build, or None.
+    The probe runs once, the first time a video is encoded, rather than at import."""
+    try:
+        result = subprocess.run(
+            [get_setting("FFMPEG_BINARY"), "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for encoder in HARDWARE_ENCODERS:
+        if encoder in result.stdout:
+            return encoder
+    return None
+
+# Plain [[HH:]MM:]SS[.fff] timestamps, parsed in a single match
+TIMESTAMP_PATTERN = re.compile(r'^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)$')
+
 def timestamp_to_seconds(timestamp: str) -> float:
     """Convert a timestamp string (HH:MM:SS or MM:SS) to seconds."""
+    match = TIMESTAMP_PATTERN.match(timestamp)
+    if match:
+        hours, minutes, seconds = match.groups()
+        return (int(hours) * 3600 if hours else 0) + (int(minutes) * 60 if minutes else 0) + float(seconds)
+    
+    # Fall back to splitting for anything unusual, such as padded or fractional fields
     parts = timestamp.split(":")
     if len(parts) == 2:  # MM:SS format
         minutes, seconds = parts
@@ -23,13 +63,103 @@ def timestamp_to_seconds(timestamp: str) -> float:
         except ValueError:
             raise ValueError(f"Invalid timestamp format: {timestamp}")
 
+def seconds_to_timestamp(seconds: float) -> str:
+    """Convert seconds to a MM:SS timestamp string."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def merge_repeated_images(images_manifest):
+    """Merge consecutive manifest entries that show the same image into one longer segment."""
+    merged = []
+    for segment in images_manifest:
+        # Downloads get a new local path per segment, so compare the remote source when known
+        source = segment.get("source_url")
+        if not source or source == "Not Found":
+            source = segment.get("url")
+        
+        if merged and merged[-1][0] == source:
+            previous = merged[-1][1]
+            previous_start = timestamp_to_seconds(previous["start"])
+            end_time = timestamp_to_seconds(segment["start"]) + timestamp_to_seconds(segment["duration"])
+            previous["duration"] = seconds_to_timestamp(end_time - previous_start)
+            previous["text"] = f"{previous.get('text', '')} {segment.get('text', '')}".strip()
+        else:
+            merged.append((source, dict(segment)))
+    
+    return [segment for _, segment in merged]
+
+def parse_manifest_timings(images_manifest):
+    """Parse the MM:SS start and duration strings of every manifest entry once into float arrays."""
+    count = len(images_manifest)
+    starts = np.fromiter((timestamp_to_seconds(s["start"]) for s in images_manifest), dtype=np.float64, count=count)
+    durations = np.fromiter((timestamp_to_seconds(s["duration"]) for s in images_manifest), dtype=np.float64, count=count)
+    return starts, durations
+
+def parse_transcript_columns(detailed_transcript):
+    """Split the word-level transcript into parallel start, end and word columns."""
+    count = len(detailed_transcript)
+    starts = np.fromiter((w.get("start", 0) for w in detailed_transcript), dtype=np.float64, count=count)
+    ends = np.fromiter((w.get("end", 0) for w in detailed_transcript), dtype=np.float64, count=count)
+    words = [w.get("word", "") for w in detailed_transcript]
+    return starts, ends, words
+
+# Words of two or more characters plus the single-letter words "I" and "a"; punctuation and
+# other single characters never survived the old length filter, so they are not matched at all
+WORD_PATTERN = re.compile(r"\b(?:[\w']{2,}|[iIaA])\b")
+
 def split_text_into_words(text):
-    """Split text into words while preserving punctuation and filtering out single-letter words."""
-    # This pattern keeps punctuation attached to words
-    words = re.findall(r'\b[\w\']+\b|[.,!?;:…]', text)
+    """Split text into words, filtering out single-letter words other than 'I' and 'a'."""
+    return WORD_PATTERN.findall(text)
+
+@lru_cache(maxsize=8)
+def load_caption_font(font_path, fontsize):
+    """Load a caption font once per path and size."""
+    return ImageFont.truetype(font_path, fontsize)
+
+@lru_cache(maxsize=1024)
+def render_caption_word(word, font_path, fontsize, stroke_width=4):
+    """Rasterize a single white word with a black outline into an RGBA image."""
+    font = load_caption_font(font_path, fontsize)
+    ascent, descent = font.getmetrics()
+    width = int(np.ceil(font.getlength(word))) + stroke_width * 2
+    height = ascent + descent + stroke_width * 2
     
-    # Filter out empty strings and single-letter words (except 'I' and 'a')
-    return [word for word in words if word.strip() and (len(word) > 1 or word.lower() in ['i', 'a'])]
+    word_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(word_image).text(
+        (stroke_width, stroke_width),
+        word,
+        font=font,
+        fill="white",
+        stroke_width=stroke_width,
+        stroke_fill="black"
+    )
+    return word_image
+
+@lru_cache(maxsize=512)
+def render_caption(words, font_path, fontsize):
+    """Compose a caption from the cached word images and return it as a read-only RGBA array."""
+    font = load_caption_font(font_path, fontsize)
+    space_width = font.getlength(" ")
+    word_images = [render_caption_word(word, font_path, fontsize) for word in words]
+    
+    # Lay words out by their advance width so spacing matches normal text rendering
+    x_positions = []
+    x = 0.0
+    for word in words:
+        x_positions.append(int(round(x)))
+        x += font.getlength(word) + space_width
+    
+    width = x_positions[-1] + word_images[-1].width
+    height = max(word_image.height for word_image in word_images)
+    
+    caption = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for word_image, x_position in zip(word_images, x_positions):
+        caption.alpha_composite(word_image, (x_position, 0))
+    
+    # The array is shared between every clip showing this caption
+    caption_array = np.array(caption)
+    caption_array.flags.writeable = False
+    return caption_array
 
 def create_word_by_word_clips_from_detailed_transcript(detailed_transcript, fontsize, font_path, shorts_width):
     """Create a sequence of clips with groups of 3 words appearing and disappearing based on detailed transcript timing."""
@@ -39,28 +169,17 @@ def create_word_by_word_clips_from_detailed_transcript(detailed_transcript, font
     if not detailed_transcript or len(detailed_transcript) == 0:
         return []
     
-    # Group words into chunks of 3 words
-    word_groups = []
-    current_group = []
-    
-    for i, word_data in enumerate(detailed_transcript):
-        # Add word to current group
-        current_group.append(word_data)
-        
-        # When we have 3 words or reach the end of the transcript, finalize the group
-        if len(current_group) >= 3 or i == len(detailed_transcript) - 1:
-            if current_group:  # Make sure the group isn't empty
-                word_groups.append(current_group)
-                current_group = []
+    # Read the transcript fields once into parallel columns instead of per-word dict lookups
+    starts, ends, words = parse_transcript_columns(detailed_transcript)
+    word_count = len(words)
     
-    # Create clips for each word group
-    for group in word_groups:
-        if not group:  # Skip empty groups
-            continue
+    # Create clips for each group of 3 words; the last group may be shorter
+    for group_start in range(0, word_count, 3):
+        group_end = min(group_start + 3, word_count)
         
         # Get the start time from the first word and end time from the last word
-        start_time = group[0].get("start", 0)
-        end_time = group[-1].get("end", 0)
+        start_time = float(starts[group_start])
+        end_time = float(ends[group_end - 1])
         
         # Skip if timing is invalid
         if end_time <= start_time:
@@ -69,58 +188,150 @@ def create_word_by_word_clips_from_detailed_transcript(detailed_transcript, font
         # Calculate duration
         duration = end_time - start_time
         
-        # Combine the words in the group
-        words_text = " ".join([word.get("word", "") for word in group])
-        
-        # Create text clip for the word group with increased boldness and better visibility
-        text_clip = TextClip(
-            words_text, 
-            fontsize=fontsize, 
-            color='white', 
-            font=font_path,
-            stroke_width=4,  # Increased stroke width for more boldness
-            stroke_color='black',  # Black outline for better contrast
-            method='label'
-        )
+        # Compose the caption from the cached word images; repeated groups reuse the whole caption
+        group_words = tuple(word for word in words[group_start:group_end] if word)
+        if not group_words:
+            continue
+        
+        text_clip = ImageClip(render_caption(group_words, font_path, fontsize), transparent=True)
         
         # Set timing and position - Position below center instead of at center
-        # Use lambda function to calculate position dynamically based on clip size
+        # A static position lets MoviePy skip the per-frame position callback
         text_clip = (text_clip
                     .set_start(start_time)
                     .set_duration(duration)
-                    .set_position(lambda t: ('center', 1920//2 + 350)))  # Position 150px below the center
+                    .set_position(('center', 1920//2 + 350)))  # Position 350px below the center
         
         word_clips.append(text_clip)
     
     return word_clips
 
+PLACEHOLDER_IMAGE_PATH = "assets/images/placeholder.jpg"
+
+@lru_cache(maxsize=1)
+def load_placeholder_background():
+    """Decode the placeholder background once and share the read-only array between all clips."""
+    with Image.open(PLACEHOLDER_IMAGE_PATH) as image:
+        placeholder = np.array(image.convert("RGB"))
+    placeholder.flags.writeable = False
+    return placeholder
+
+def load_fitted_image(image_path, shorts_width, shorts_height):
+    """Load an image as an RGB array scaled once to fit entirely within the Shorts frame."""
+    with Image.open(image_path) as image:
+        # Use the smaller scaling factor to ensure the entire image fits
+        scale_factor = min(shorts_width / image.width, shorts_height / image.height)
+        new_size = (int(image.width * scale_factor), int(image.height * scale_factor))
+        
+        # Let the JPEG decoder downscale large images by a power of two while decoding
+        image.draft("RGB", new_size)
+        image = image.convert("RGB")
+        if image.size != new_size:
+            image = image.resize(new_size, Image.LANCZOS)
+        return np.asarray(image)
+
+# Sampling rate of the precomputed vibration offsets, well above the 24fps output
+VIBRATION_TABLE_RATE = 240
+
+def build_vibration_table(duration):
+    """Precompute the (x, y) vibration offsets of an image for every 1/240s of its duration."""
+    # Further reduced amplitude vibration
+    base_amplitude = 2.5  # Reduced from 4 to 2.5
+    
+    # Create subtle, non-uniform vibrations
+    # Use different frequencies and random factors
+    t = np.arange(0, duration + 1.0 / VIBRATION_TABLE_RATE, 1.0 / VIBRATION_TABLE_RATE, dtype=np.float32)
+    t_mod = t * 6  # Slower time scale (reduced from 8)
+    
+    # Create gentle abrupt changes
+    abrupt_factor = 0.8 + 0.1 * np.sin(t_mod * 5.0)  # Reduced variation
+    
+    # Random spikes in movement (less frequent and smaller), only 10% of the time
+    spike = (t_mod % 1.0) < 0.1
+    x_spike = np.where(spike, base_amplitude * 1.0, 0.0)  # Reduced spike multiplier
+    y_spike = np.where(spike, base_amplitude * 0.8, 0.0)  # Reduced spike multiplier
+    
+    # Combine smooth and abrupt movements
+    x_offset = np.sin(t_mod * 4.0 + 0.5) * base_amplitude * abrupt_factor + x_spike
+    y_offset = np.cos(t_mod * 5.0 + 1.5) * base_amplitude * abrupt_factor + y_spike
+    
+    return np.stack([x_offset, y_offset], axis=1).astype(np.float32)
+
+def create_vibrating_image_clip(image, background, x_center, y_center, vibration_offsets):
+    """Create a clip whose frames paste the image onto a copy of the background at its vibrating position."""
+    image_height, image_width = image.shape[:2]
+    frame_height, frame_width = background.shape[:2]
+    
+    def make_frame(t):
+        index = min(int(t * VIBRATION_TABLE_RATE), len(vibration_offsets) - 1)
+        vib_x, vib_y = vibration_offsets[index]
+        
+        # Use the pre-calculated center positions and add vibration, truncated like MoviePy's blit
+        x = int(x_center + vib_x)
+        y = int(y_center + vib_y)
+        
+        # Clip the pasted region to the frame when the vibration pushes the image past an edge
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + image_width, frame_width), min(y + image_height, frame_height)
+        
+        frame = background.copy()
+        frame[top:bottom, left:right] = image[top - y:bottom - y, left - x:right - x]
+        return frame
+    
+    return VideoClip(make_frame)
+
+# Transition played between images; its sound is mixed in by ffmpeg when muxing the final video
+SHUTTER_EFFECT_PATH = "assets/audios/shutter-effect.mp4"
+
 def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_height):
     """Create fullscreen image overlays that appear throughout the video,
-    ensuring text overlay areas remain visible."""
+    ensuring text overlay areas remain visible. Also returns whether the transitions have a sound."""
     image_clips = []
     transition_clips = []
+    transition_has_audio = False
     
     # Use all segments
     all_segments = images_manifest
     
     if not all_segments:
-        return image_clips  # Return empty list if no segments
+        return image_clips, transition_clips, transition_has_audio  # Return empty lists if no segments
     
     # Use ALL segments instead of just 90%
     selected_indices = list(range(len(all_segments)))
     
+    # Parse all segment timings up front instead of per image
+    segment_starts, segment_durations = parse_manifest_timings(all_segments)
+    
+    # Decode and fit every image in parallel up front; PIL releases the GIL while decoding and resizing
+    image_loader = ThreadPoolExecutor(max_workers=os.cpu_count())
+    fitted_images = {
+        segment["url"]: image_loader.submit(load_fitted_image, segment["url"], shorts_width, shorts_height)
+        for segment in all_segments
+        if segment.get("url") and os.path.exists(segment["url"])
+    }
+    image_loader.shutdown(wait=False)
+    
     # Track the end time of the previous image to ensure no gaps
     previous_end_time = 0
     
     # Load the shutter effect transition video
-    shutter_effect_path = "assets/audios/shutter-effect.mp4"
+    shutter_effect_path = SHUTTER_EFFECT_PATH
+    shutter_transition = None
     if os.path.exists(shutter_effect_path):
         shutter_effect = VideoFileClip(shutter_effect_path, audio=True)  # Explicitly load audio
-        # Set the transition duration (in seconds)
-        transition_duration = min(0.5, shutter_effect.duration)  # Use at most 0.5 seconds or the full duration if shorter
+        try:
+            # Set the transition duration (in seconds)
+            transition_duration = min(0.5, shutter_effect.duration)  # Use at most 0.5 seconds or the full duration if shorter
+            
+            # Decode and resize the transition frames once to fill the screen; every transition reuses them
+            transition_frames = list(shutter_effect.resize(height=shorts_height).iter_frames(dtype="uint8"))
+            shutter_transition = ImageSequenceClip(transition_frames, fps=shutter_effect.fps)
+            # ffmpeg mixes the sound in from the file when muxing, so only note whether there is one
+            transition_has_audio = shutter_effect.audio is not None
+        finally:
+            shutter_effect.close()
     else:
         print(f"Warning: Shutter effect video not found at {shutter_effect_path}")
-        shutter_effect = None
         transition_duration = 0
     
     for i, idx in enumerate(selected_indices):
@@ -133,11 +344,13 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
         
         # Load the image
         try:
-            img_clip = ImageClip(segment["url"])
+            # Wait for the image decoded and resized once to fit the screen while showing the entire image
+            img_array = fitted_images[segment["url"]].result()
+            img_height, img_width = img_array.shape[:2]
             
             # Calculate start time and duration
-            start_time = timestamp_to_seconds(segment["start"])
-            duration = timestamp_to_seconds(segment["duration"])
+            start_time = float(segment_starts[idx])
+            duration = float(segment_durations[idx])
             
             # Show image for 100% of the segment duration
             img_duration = duration
@@ -162,64 +375,22 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
             # Calculate the available height for the image
             available_height = shorts_height - text_height_reserve
             
-            # Resize to fit within the available screen area while showing the entire image
-            width_scale = shorts_width / img_clip.w
-            height_scale = shorts_height / img_clip.h  # Use full screen height for scaling
-            
-            # Use the smaller scaling factor to ensure the entire image fits
-            scale_factor = min(width_scale, height_scale)
-            
-            # Resize the image
-            img_clip = img_clip.resize(scale_factor)
-            
             # Center the image horizontally and vertically
-            x_center = (shorts_width - img_clip.w) / 2
-            y_center = (shorts_height - img_clip.h) / 2
+            x_center = (shorts_width - img_width) / 2
+            y_center = (shorts_height - img_height) / 2
             
-            # Create a full screen background using the image layout
-            img_bg = ImageClip("assets/images/placeholder.jpg").set_duration(img_duration)
+            # Precompute the vibration offsets; the last image may be extended to the end of the video
+            vibration_offsets = build_vibration_table(max(img_duration, video_duration - img_start))
             
-            # Add vibration effect to the image
-            def vibration_effect(t):
-                # Further reduced amplitude vibration
-                base_amplitude = 2.5  # Reduced from 4 to 2.5
-                
-                # Create subtle, non-uniform vibrations
-                # Use different frequencies and random factors
-                t_mod = t * 6  # Slower time scale (reduced from 8)
-                
-                # Create gentle abrupt changes
-                abrupt_factor = 0.8 + 0.1 * np.sin(t_mod * 5.0)  # Reduced variation
-                
-                # Random spikes in movement (less frequent and smaller)
-                if (t_mod % 1.0) < 0.1:  # Create sudden movements only 10% of the time
-                    x_spike = base_amplitude * 1.0  # Reduced spike multiplier
-                    y_spike = base_amplitude * 0.8  # Reduced spike multiplier
-                else:
-                    x_spike = 0
-                    y_spike = 0
-                
-                # Combine smooth and abrupt movements
-                x_offset = np.sin(t_mod * 4.0 + 0.5) * base_amplitude * abrupt_factor + x_spike
-                y_offset = np.cos(t_mod * 5.0 + 1.5) * base_amplitude * abrupt_factor + y_spike
-                
-                return (x_offset, y_offset)
-            
-            # Define position function for vibration only (no zoom)
-            def position_function(t):
-                vib_x, vib_y = vibration_effect(t)
-                
-                # Use the pre-calculated center positions and add vibration
-                new_x = x_center + vib_x
-                new_y = y_center + vib_y
-                
-                return (new_x, new_y)
-            
-            # Create the final positioned image with background
-            positioned_img = CompositeVideoClip([
-                img_bg,
-                img_clip.set_position(position_function)
-            ])
+            # Create the final positioned image with background as a single layer that pastes the
+            # vibrating image onto the full screen placeholder, instead of a nested composite
+            positioned_img = create_vibrating_image_clip(
+                img_array,
+                load_placeholder_background(),
+                x_center,
+                y_center,
+                vibration_offsets
+            )
             
             # Set timing
             positioned_img = (positioned_img
@@ -229,18 +400,12 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
             image_clips.append(positioned_img)
             
             # Add transition effect at the end of this image (except for the last image)
-            if shutter_effect is not None and i < len(selected_indices) - 1:
+            if shutter_transition is not None and i < len(selected_indices) - 1:
                 # Calculate when to start the transition (at the end of the current image minus transition duration)
                 transition_start = img_start + img_duration - transition_duration
                 
-                # Create a copy of the shutter effect for this transition
-                transition_clip = shutter_effect.copy()
-                
-                # Resize the transition to fill the screen
-                transition_clip = transition_clip.resize(height=shorts_height)
-                
-                # Set the timing for the transition
-                transition_clip = (transition_clip
+                # Set the timing for the transition on the shared pre-resized frames
+                transition_clip = (shutter_transition
                                 .set_start(transition_start)
                                 .set_duration(transition_duration))
                 
@@ -259,10 +424,167 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
             extended_duration = last_clip.duration + (video_duration - previous_end_time)
             image_clips[-1] = last_clip.set_duration(extended_duration)
     
-    # Combine image clips and transition clips
-    return image_clips + transition_clips
+    # Keep transitions separate; their sound is mixed in when muxing
+    return image_clips, transition_clips, transition_has_audio
+
+def clips_cover_duration(clips, duration):
+    """Return True if the clips together leave no gap anywhere in [0, duration]."""
+    covered_until = 0
+    for clip in sorted(clips, key=lambda clip: clip.start):
+        if clip.start > covered_until:
+            return False
+        covered_until = max(covered_until, clip.end)
+    return covered_until >= duration
+
+def mix_background_music(audio_path, bg_music_path, output_path, volume=0.1):
+    """Mix background music, looped and lowered in volume, under the voice track in a single ffmpeg pass."""
+    filter_graph = (
+        f"[0:a]aresample=44100[voice];"
+        f"[1:a]aresample=44100,volume={volume}[bg];"
+        # Sum without normalization so the voice keeps its level, and stop when the voice ends
+        f"[voice][bg]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]"
+    )
+    subprocess.run(
+        [
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-i", audio_path,
+            "-stream_loop", "-1", "-i", bg_music_path,
+            "-filter_complex", filter_graph,
+            "-map", "[aout]",
+            "-c:a", "pcm_s16le",
+            output_path
+        ],
+        check=True, capture_output=True
+    )
+    return output_path
+
+# Shorts get re-encoded by YouTube anyway, so trade x264 effort for speed and hold quality with CRF
+LIBX264_PRESET = 'ultrafast'
+LIBX264_PARAMS = ['-crf', '20']
+
+def write_final_video(composite, output_path):
+    """Encode the composite's video stream with the hardware encoder if one is available, else libx264."""
+    hardware_encoder = detect_hardware_encoder()
+    if hardware_encoder:
+        try:
+            composite.write_videofile(
+                output_path,
+                fps=24,
+                codec=hardware_encoder,
+                audio=False,
+                threads=os.cpu_count(),
+                # MoviePy only adds yuv420p for libx264, hardware encoders need it explicitly
+                ffmpeg_params=HARDWARE_ENCODERS[hardware_encoder] + ['-pix_fmt', 'yuv420p']
+            )
+            return
+        except (IOError, OSError) as e:
+            # The encoder can be compiled in without a usable device (e.g. nvenc without a GPU)
+            print(f"Warning: {hardware_encoder} encoding failed, falling back to libx264: {e}")
+    
+    composite.write_videofile(
+        output_path,
+        fps=24,
+        codec="libx264",
+        audio=False,
+        threads=os.cpu_count(),
+        preset=LIBX264_PRESET,
+        ffmpeg_params=LIBX264_PARAMS
+    )
+
+def mux_audio(video_path, audio_path, output_path, transition_audio_path=None, transitions=()):
+    """Combine an encoded video stream and an audio track, copying the video without re-encoding.
+    The sound of transition_audio_path is mixed in at each (start, duration) in transitions."""
+    inputs = ["-i", video_path, "-i", audio_path]
+    audio_map = ["-map", "1:a:0"]
+    
+    if transition_audio_path and transitions:
+        inputs += ["-i", transition_audio_path]
+        # Split the transition sound once per transition and delay each copy to its start time
+        split_labels = "".join(f"[split{i}]" for i in range(len(transitions)))
+        filter_graph = f"[1:a]aresample=44100[main];[2:a]aresample=44100,asplit={len(transitions)}{split_labels};"
+        for i, (start, duration) in enumerate(transitions):
+            delay_ms = int(round(start * 1000))
+            filter_graph += f"[split{i}]atrim=duration={duration},adelay={delay_ms}:all=1[transition{i}];"
+        transition_labels = "".join(f"[transition{i}]" for i in range(len(transitions)))
+        # Sum without normalization like a plain overlay, and keep the length of the main track
+        filter_graph += (
+            f"[main]{transition_labels}amix=inputs={len(transitions) + 1}"
+            f":duration=first:dropout_transition=0:normalize=0[aout]"
+        )
+        audio_map = ["-filter_complex", filter_graph, "-map", "[aout]"]
+    
+    subprocess.run(
+        [
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            *inputs,
+            "-map", "0:v:0", *audio_map,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-shortest",
+            # Put the index at the front so playback can start before the upload finishes
+            "-movflags", "+faststart",
+            output_path
+        ],
+        check=True, capture_output=True
+    )
+    return output_path
+
+# Rendered videos are kept here by a hash of their inputs so identical reruns are free
+VIDEO_CACHE_DIR = "output/final_videos/cache"
+# Bump when the rendering code changes in a way the cache key can't see, so older renders aren't reused
+VIDEO_RENDER_VERSION = 1
+CAPTION_FONT_PATH = "assets/fonts/LilitaOne-Regular.ttf"
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def video_cache_key(state):
+    """Hash everything the rendered video depends on: the transcript, manifest, media and asset file
+    contents, and the render settings."""
+    inputs = {
+        key: state.get(key)
+        for key in ("audio_path", "bg_music_path", "images_manifest", "detailed_transcript")
+    }
+    inputs["render"] = {
+        "version": VIDEO_RENDER_VERSION,
+        "hardware_encoder": detect_hardware_encoder(),
+        "hardware_encoders": HARDWARE_ENCODERS,
+        "libx264": [LIBX264_PRESET, LIBX264_PARAMS],
+    }
+    media_paths = [state.get("audio_path"), state.get("bg_music_path")]
+    media_paths += [CAPTION_FONT_PATH, PLACEHOLDER_IMAGE_PATH, SHUTTER_EFFECT_PATH]
+    media_paths += [segment.get("url") for segment in state.get("images_manifest") or []]
+    inputs["files"] = {
+        path: file_digest(path)
+        for path in media_paths
+        if path and os.path.exists(path)
+    }
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 def create_video_with_overlays(state):
+    """Create the final video, reusing an earlier render when the inputs are unchanged."""
+    cache_key = video_cache_key(state)
+    cached_path = os.path.join(VIDEO_CACHE_DIR, f"{cache_key}.mp4")
+    if os.path.exists(cached_path):
+        print(f"Inputs unchanged, reusing cached video: {cached_path}")
+        return {"final_video_path": cached_path}
+    
+    result = render_video_with_overlays(state)
+    
+    os.makedirs(VIDEO_CACHE_DIR, exist_ok=True)
+    # Copy to a temporary file first so an interrupted copy never leaves a truncated video as a cache hit
+    temp_path = f"{cached_path}.part"
+    shutil.copyfile(result["final_video_path"], temp_path)
+    os.replace(temp_path, cached_path)
+    return result
+
+def render_video_with_overlays(state):
     print("Creating final video with word-by-word highlighting...")
     print("\n\nState from create_video node: ", state)
     
@@ -284,17 +606,21 @@ def create_video_with_overlays(state):
         video_duration = audio.duration
         
         # Create a background using the image layout for the Shorts format
-        background = ImageClip("assets/images/placeholder.jpg")
+        background = ImageClip(load_placeholder_background())
         background = background.set_duration(video_duration)
         
         # Get fonts
-        font_path = "assets/fonts/LilitaOne-Regular.ttf"
+        font_path = CAPTION_FONT_PATH
         fontsize = 80  # Increased font size for better visibility and boldness
         
         # Create image overlays using the local image paths from images_manifest
         # Create these first so they appear behind the text
-        image_and_transition_clips = create_image_overlays(
-            state["images_manifest"], 
+        images_manifest = merge_repeated_images(state["images_manifest"])
+        if len(images_manifest) < len(state["images_manifest"]):
+            print(f"Merged repeated images: {len(state['images_manifest'])} -> {len(images_manifest)} segments")
+        
+        image_clips, transition_clips, transition_has_audio = create_image_overlays(
+            images_manifest, 
             video_duration,
             shorts_width,
             shorts_height
@@ -309,54 +635,33 @@ def create_video_with_overlays(state):
         )
         
         # Add background music if provided
-        final_audio = audio
-        transition_audio_clips = []
+        final_audio_path = state["audio_path"]
+        transitions = []
         
-        # Extract audio from transition clips if they have audio
-        for clip in image_and_transition_clips:
-            if hasattr(clip, 'audio') and clip.audio is not None:
-                # Create an audio clip with the same timing as the video clip
-                transition_audio = clip.audio.set_start(clip.start).set_duration(clip.duration)
-                transition_audio_clips.append(transition_audio)
+        # Collect the timing of the transition clips if they have a sound; ffmpeg mixes it in when muxing
+        if transition_has_audio:
+            transitions = [(clip.start, clip.duration) for clip in transition_clips]
         
         if "bg_music_path" in state and state["bg_music_path"] and os.path.exists(state["bg_music_path"]):
             try:
-                # Load background music
-                bg_music = AudioFileClip(state["bg_music_path"])
-                
-                # Set the volume to be low (10% of original)
-                bg_music = bg_music.volumex(0.1)
-                
-                # Loop the music if it's shorter than the video
-                if bg_music.duration < video_duration:
-                    # Calculate how many times we need to loop
-                    loop_count = int(np.ceil(video_duration / bg_music.duration))
-                    # Create a list of music clips
-                    music_clips = [bg_music] * loop_count
-                    # Concatenate the clips
-                    bg_music = concatenate_audioclips(music_clips)
-                
-                # Trim to match video duration
-                bg_music = bg_music.subclip(0, video_duration)
-                
-                # Mix background music with original audio
-                if transition_audio_clips:
-                    # Include transition audio clips in the final audio
-                    final_audio = CompositeAudioClip([audio, bg_music] + transition_audio_clips)
-                else:
-                    final_audio = CompositeAudioClip([audio, bg_music])
+                # Pre-mix the looped background music under the voice once with ffmpeg
+                os.makedirs("output/final_videos", exist_ok=True)
+                mixed_audio_path = f"output/final_videos/mixed_audio_{datetime.now().timestamp()}.wav"
+                mix_background_music(state["audio_path"], state["bg_music_path"], mixed_audio_path)
+                final_audio_path = mixed_audio_path
                 
                 print(f"Background music added from {state['bg_music_path']}")
             except Exception as e:
                 print(f"Warning: Could not add background music: {e}")
         else:
             print("No background music path provided or file not found, continuing without background music")
-            # Still include transition audio if available
-            if transition_audio_clips:
-                final_audio = CompositeAudioClip([audio] + transition_audio_clips)
         
         # Combine all clips - ORDER MATTERS: background first, then images, then text on top
-        all_clips = [background] + image_and_transition_clips + text_overlays
+        # Every image carries its own full screen background, so the shared one is only needed for gaps
+        if clips_cover_duration(image_clips, video_duration):
+            all_clips = image_clips + transition_clips + text_overlays
+        else:
+            all_clips = [background] + image_clips + transition_clips + text_overlays
         
         # Create composite video
         composite = CompositeVideoClip(all_clips, size=(shorts_width, shorts_height))
@@ -364,26 +669,20 @@ def create_video_with_overlays(state):
         # Set the duration to match the audio
         composite = composite.set_duration(video_duration)
         
-        # Set the final audio
-        composite = composite.set_audio(final_audio)
-        
         # Create output directory if it doesn't exist
         output_dir = "output/final_videos"
         os.makedirs(output_dir, exist_ok=True)
         
         # Generate output path with timestamp
-        output_path = f"{output_dir}/video_output_{datetime.now().timestamp()}.mp4"
-        
-        # Write the final video
-        composite.write_videofile(
-            output_path,
-            fps=24,
-            codec="libx264",
-            audio_codec="aac",
-            audio=True,
-            threads=4,
-            preset='medium'
-        )
+        timestamp = datetime.now().timestamp()
+        output_path = f"{output_dir}/video_output_{timestamp}.mp4"
+        video_only_path = f"{output_dir}/video_only_{timestamp}.mp4"
+        
+        # Write the final video stream
+        write_final_video(composite, video_only_path)
+        
+        # Mux the audio and transition sounds onto the finished video stream without re-encoding the video
+        mux_audio(video_only_path, final_audio_path, output_path, SHUTTER_EFFECT_PATH, transitions)
         
         # Return the path to the final video
         return {"final_video_path": output_path}
@@ -398,12 +697,17 @@ def create_video_with_overlays(state):
                 composite.close()
             if 'audio' in locals():
                 audio.close()
-            if 'bg_music' in locals():
-                bg_music.close()
+            if 'mixed_audio_path' in locals() and os.path.exists(mixed_audio_path):
+                os.remove(mixed_audio_path)
+            if 'video_only_path' in locals() and os.path.exists(video_only_path):
+                os.remove(video_only_path)
             
-            # Close all image clips
-            if 'image_and_transition_clips' in locals():
-                for clip in image_and_transition_clips:
+            # Close all image and transition clips
+            if 'image_clips' in locals():
+                for clip in image_clips:
+                    clip.close()
+            if 'transition_clips' in locals():
+                for clip in transition_clips:
                     clip.close()
             
             # Close all text clips
@@ -411,14 +715,12 @@ def create_video_with_overlays(state):
                 for clip in text_overlays:
                     clip.close()
                     
-            # Close shutter effect clip if it exists
-            if 'shutter_effect' in locals() and shutter_effect is not None:
-                shutter_effect.close()
-                    
         except Exception as e:
             print(f"Warning: Failed to clean up some MoviePy clips: {e}")
 
 if __name__ == "__main__":
-    state = {'topic': 'Recent launch of Gemini 2.5 pro', 'script': "\n    Hey tech enthusiasts! Guess what? Meta just dropped Llama 4... and wow, it's a game-changer! They've released two initial models: Scout and Maverick.\n\n    Scout runs on a single H100 GPU but packs a punch with 17 billion active parameters and—get this—a context window of 10 MILLION tokens! That's insane for document processing.\n\n    Maverick is the multilingual beast with 400 billion total parameters supporting 12 languages and amazing multimodal abilities.\n\n    But here's the juicy part... they're still training the most powerful version called 'Behemoth' with a mind-blowing 2 TRILLION parameters! Can you imagine what that will do?\n\n    What makes Llama 4 special? It uses a Mixture of Experts architecture and early fusion for handling text, images, and video seamlessly.\n\n    The best part? It's open-source! You can download it now from llama.com or try it on Meta's platforms.\n\n    Ready to build something amazing with Llama 4? Let me know in the comments!\n    ", 'audio_path': 'assets/audios/audio.mp3', 'detailed_transcript': [{'word': 'Hey', 'start': 0.066, 'end': 0.286, 'confidence': 0.98, 'punctuated_word': 'Hey'}, {'word': 'tech', 'start': 0.286, 'end': 0.516, 'confidence': 0.99, 'punctuated_word': 'tech'}, {'word': 'enthusiasts,', 'start': 0.516, 'end': 1.166, 'confidence': 0.99, 'punctuated_word': 'enthusiasts,'}, {'word': 'guess', 'start': 1.306, 'end': 1.616, 'confidence': 0.99, 'punctuated_word': 'guess'}, {'word': 'what?', 'start': 1.616, 'end': 1.886, 'confidence': 0.99, 'punctuated_word': 'what?'}, {'word': 'Meta', 'start': 1.976, 'end': 2.256, 'confidence': 0.99, 'punctuated_word': 'Meta'}, {'word': 'just', 'start': 2.256, 'end': 2.496, 'confidence': 0.99, 'punctuated_word': 'just'}, {'word': 'dropped', 'start': 2.496, 'end': 2.806, 'confidence': 0.99, 'punctuated_word': 'dropped'}, {'word': 'Llama', 'start': 2.956, 'end': 3.246, 'confidence': 0.98, 'punctuated_word': 'Llama'}, {'word': '4,', 'start': 3.246, 'end': 3.456, 'confidence': 0.98, 'punctuated_word': '4,'}, {'word': 'and', 'start': 3.706, 'end': 3.866, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'wow,', 'start': 4.096, 'end': 4.356, 'confidence': 0.99, 'punctuated_word': 'wow,'}, {'word': "it's", 'start': 4.356, 'end': 4.526, 'confidence': 0.99, 'punctuated_word': "it's"}, {'word': 'a', 'start': 4.526, 'end': 4.576, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'game', 'start': 4.636, 'end': 4.896, 'confidence': 0.99, 'punctuated_word': 'game'}, {'word': 'changer.', 'start': 4.896, 'end': 5.316, 'confidence': 0.99, 'punctuated_word': 'changer.'}, {'word': "They've", 'start': 5.426, 'end': 5.686, 'confidence': 0.99, 'punctuated_word': "They've"}, {'word': 'released', 'start': 5.686, 'end': 6.086, 'confidence': 0.99, 'punctuated_word': 'released'}, {'word': 'two', 'start': 6.086, 'end': 6.266, 'confidence': 0.99, 'punctuated_word': 'two'}, {'word': 'initial', 'start': 6.266, 'end': 6.656, 'confidence': 0.99, 'punctuated_word': 'initial'}, {'word': 'models,', 'start': 6.656, 'end': 7.046, 'confidence': 0.99, 'punctuated_word': 'models,'}, {'word': 'Scout', 'start': 7.136, 'end': 7.486, 'confidence': 0.99, 'punctuated_word': 'Scout'}, {'word': 'and', 'start': 7.486, 'end': 7.626, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'Maverick.', 'start': 7.626, 'end': 8.096, 'confidence': 0.99, 'punctuated_word': 'Maverick.'}, {'word': 'Scout', 'start': 8.216, 'end': 8.566, 'confidence': 0.99, 'punctuated_word': 'Scout'}, {'word': 'runs', 'start': 8.566, 'end': 8.816, 'confidence': 0.99, 'punctuated_word': 'runs'}, {'word': 'on', 'start': 8.816, 'end': 8.916, 'confidence': 0.99, 'punctuated_word': 'on'}, {'word': 'a', 'start': 8.916, 'end': 8.966, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'single', 'start': 9.066, 'end': 9.396, 'confidence': 0.99, 'punctuated_word': 'single'}, {'word': 'H100', 'start': 9.516, 'end': 9.846, 'confidence': 0.95, 'punctuated_word': 'H100'}, {'word': 'GPU', 'start': 9.846, 'end': 10.236, 'confidence': 0.99, 'punctuated_word': 'GPU'}, {'word': 'but', 'start': 10.466, 'end': 10.666, 'confidence': 0.99, 'punctuated_word': 'but'}, {'word': 'packs', 'start': 10.716, 'end': 11.016, 'confidence': 0.99, 'punctuated_word': 'packs'}, {'word': 'a', 'start': 11.016, 'end': 11.046, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'punch', 'start': 11.126, 'end': 11.416, 'confidence': 0.99, 'punctuated_word': 'punch'}, {'word': 'with', 'start': 11.416, 'end': 11.606, 'confidence': 0.99, 'punctuated_word': 'with'}, {'word': '17', 'start': 11.766, 'end': 12.146, 'confidence': 0.96, 'punctuated_word': '17'}, {'word': 'billion', 'start': 12.216, 'end': 12.566, 'confidence': 0.99, 'punctuated_word': 'billion'}, {'word': 'active', 'start': 12.566, 'end': 12.916, 'confidence': 0.99, 'punctuated_word': 'active'}, {'word': 'parameters', 'start': 12.916, 'end': 13.446, 'confidence': 0.99, 'punctuated_word': 'parameters'}, {'word': 'and', 'start': 13.446, 'end': 13.616, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'get', 'start': 13.616, 'end': 13.826, 'confidence': 0.99, 'punctuated_word': 'get'}, {'word': 'this,', 'start': 13.826, 'end': 14.066, 'confidence': 0.99, 'punctuated_word': 'this,'}, {'word': 'a', 'start': 14.246, 'end': 14.346, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'context', 'start': 14.466, 'end': 14.866, 'confidence': 0.99, 'punctuated_word': 'context'}, {'word': 'window', 'start': 14.866, 'end': 15.186, 'confidence': 0.99, 'punctuated_word': 'window'}, {'word': 'of', 'start': 15.186, 'end': 15.316, 'confidence': 0.99, 'punctuated_word': 'of'}, {'word': '10', 'start': 15.386, 'end': 15.666, 'confidence': 0.99, 'punctuated_word': '10'}, {'word': 'million', 'start': 15.666, 'end': 16.006, 'confidence': 0.99, 'punctuated_word': 'million'}, {'word': 'tokens.', 'start': 16.006, 'end': 16.486, 'confidence': 0.99, 'punctuated_word': 'tokens.'}, {'word': "That's", 'start': 16.746, 'end': 16.996, 'confidence': 0.99, 'punctuated_word': "That's"}, {'word': 'insane', 'start': 17.076, 'end': 17.426, 'confidence': 0.99, 'punctuated_word': 'insane'}, {'word': 'for', 'start': 17.426, 'end': 17.576, 'confidence': 0.99, 'punctuated_word': 'for'}, {'word': 'document', 'start': 17.636, 'end': 18.016, 'confidence': 0.99, 'punctuated_word': 'document'}, {'word': 'processing.', 'start': 18.016, 'end': 18.486, 'confidence': 0.99, 'punctuated_word': 'processing.'}, {'word': 'Maverick', 'start': 18.686, 'end': 19.076, 'confidence': 0.99, 'punctuated_word': 'Maverick'}, {'word': 'is', 'start': 19.076, 'end': 19.206, 'confidence': 0.99, 'punctuated_word': 'is'}, {'word': 'the', 'start': 19.206, 'end': 19.326, 'confidence': 0.99, 'punctuated_word': 'the'}, {'word': 'multilingual', 'start': 19.396, 'end': 20.006, 'confidence': 0.99, 'punctuated_word': 'multilingual'}, {'word': 'beast', 'start': 20.076, 'end': 20.396, 'confidence': 0.99, 'punctuated_word': 'beast'}, {'word': 'with', 'start': 20.396, 'end': 20.586, 'confidence': 0.99, 'punctuated_word': 'with'}, {'word': '400', 'start': 20.776, 'end': 21.216, 'confidence': 0.98, 'punctuated_word': '400'}, {'word': 'billion', 'start': 21.216, 'end': 21.536, 'confidence': 0.99, 'punctuated_word': 'billion'}, {'word': 'total', 'start': 21.536, 'end': 21.876, 'confidence': 0.99, 'punctuated_word': 'total'}, {'word': 'parameters,', 'start': 21.876, 'end': 22.446, 'confidence': 0.99, 'punctuated_word': 'parameters,'}, {'word': 'supporting', 'start': 22.556, 'end': 22.956, 'confidence': 0.99, 'punctuated_word': 'supporting'}, {'word': '12', 'start': 23.066, 'end': 23.356, 'confidence': 0.98, 'punctuated_word': '12'}, {'word': 'languages', 'start': 23.356, 'end': 23.896, 'confidence': 0.99, 'punctuated_word': 'languages'}, {'word': 'and', 'start': 24.056, 'end': 24.226, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'amazing', 'start': 24.356, 'end': 24.766, 'confidence': 0.99, 'punctuated_word': 'amazing'}, {'word': 'multimodal', 'start': 24.836, 'end': 25.296, 'confidence': 0.99, 'punctuated_word': 'multimodal'}, {'word': 'abilities.', 'start': 25.296, 'end': 25.806, 'confidence': 0.99, 'punctuated_word': 'abilities.'}, {'word': 'But', 'start': 26.196, 'end': 26.386, 'confidence': 0.99, 'punctuated_word': 'But'}, {'word': "here's", 'start': 26.386, 'end': 26.646, 'confidence': 0.99, 'punctuated_word': "here's"}, {'word': 'the', 'start': 26.646, 'end': 26.746, 'confidence': 0.99, 'punctuated_word': 'the'}, {'word': 'juicy', 'start': 26.746, 'end': 27.006, 'confidence': 0.99, 'punctuated_word': 'juicy'}, {'word': 'part.', 'start': 27.006, 'end': 27.296, 'confidence': 0.99, 'punctuated_word': 'part.'}, {'word': "They're", 'start': 27.546, 'end': 27.726, 'confidence': 0.99, 'punctuated_word': "They're"}, {'word': 'still', 'start': 27.726, 'end': 27.996, 'confidence': 0.99, 'punctuated_word': 'still'}, {'word': 'training', 'start': 27.996, 'end': 28.346, 'confidence': 0.99, 'punctuated_word': 'training'}, {'word': 'the', 'start': 28.346, 'end': 28.456, 'confidence': 0.99, 'punctuated_word': 'the'}, {'word': 'most', 'start': 28.516, 'end': 28.796, 'confidence': 0.99, 'punctuated_word': 'most'}, {'word': 'powerful', 'start': 28.866, 'end': 29.266, 'confidence': 0.99, 'punctuated_word': 'powerful'}, {'word': 'version', 'start': 29.266, 'end': 29.596, 'confidence': 0.99, 'punctuated_word': 'version'}, {'word': 'called', 'start': 29.596, 'end': 29.866, 'confidence': 0.99, 'punctuated_word': 'called'}, {'word': 'Behemoth', 'start': 29.926, 'end': 30.436, 'confidence': 0.98, 'punctuated_word': 'Behemoth'}, {'word': 'with', 'start': 30.646, 'end': 30.816, 'confidence': 0.99, 'punctuated_word': 'with'}, {'word': 'a', 'start': 30.816, 'end': 30.846, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'mind-blowing', 'start': 30.936, 'end': 31.566, 'confidence': 0.99, 'punctuated_word': 'mind-blowing'}, {'word': '2', 'start': 31.626, 'end': 31.816, 'confidence': 0.98, 'punctuated_word': '2'}, {'word': 'trillion', 'start': 31.816, 'end': 32.176, 'confidence': 0.99, 'punctuated_word': 'trillion'}, {'word': 'parameters.', 'start': 32.176, 'end': 32.756, 'confidence': 0.99, 'punctuated_word': 'parameters.'}, {'word': 'Can', 'start': 32.916, 'end': 33.076, 'confidence': 0.99, 'punctuated_word': 'Can'}, {'word': 'you', 'start': 33.076, 'end': 33.206, 'confidence': 0.99, 'punctuated_word': 'you'}, {'word': 'imagine', 'start': 33.206, 'end': 33.646, 'confidence': 0.99, 'punctuated_word': 'imagine'}, {'word': 'what', 'start': 33.646, 'end': 33.836, 'confidence': 0.99, 'punctuated_word': 'what'}, {'word': 'that', 'start': 33.836, 'end': 33.996, 'confidence': 0.99, 'punctuated_word': 'that'}, {'word': 'will', 'start': 33.996, 'end': 34.166, 'confidence': 0.99, 'punctuated_word': 'will'}, {'word': 'do?', 'start': 34.166, 'end': 34.376, 'confidence': 0.99, 'punctuated_word': 'do?'}, {'word': 'What', 'start': 34.486, 'end': 34.686, 'confidence': 0.99, 'punctuated_word': 'What'}, {'word': 'makes', 'start': 34.686, 'end': 34.966, 'confidence': 0.99, 'punctuated_word': 'makes'}, {'word': 'Llama', 'start': 34.966, 'end': 35.266, 'confidence': 0.97, 'punctuated_word': 'Llama'}, {'word': '4', 'start': 35.266, 'end': 35.406, 'confidence': 0.97, 'punctuated_word': '4'}, {'word': 'special?', 'start': 35.406, 'end': 35.846, 'confidence': 0.99, 'punctuated_word': 'special?'}, {'word': 'It', 'start': 36.186, 'end': 36.306, 'confidence': 0.99, 'punctuated_word': 'It'}, {'word': 'uses', 'start': 36.306, 'end': 36.616, 'confidence': 0.99, 'punctuated_word': 'uses'}, {'word': 'a', 'start': 36.616, 'end': 36.646, 'confidence': 0.99, 'punctuated_word': 'a'}, {'word': 'mixture', 'start': 36.746, 'end': 37.096, 'confidence': 0.99, 'punctuated_word': 'mixture'}, {'word': 'of', 'start': 37.096, 'end': 37.196, 'confidence': 0.99, 'punctuated_word': 'of'}, {'word': 'experts', 'start': 37.276, 'end': 37.766, 'confidence': 0.99, 'punctuated_word': 'experts'}, {'word': 'architecture', 'start': 37.766, 'end': 38.366, 'confidence': 0.99, 'punctuated_word': 'architecture'}, {'word': 'and', 'start': 38.366, 'end': 38.516, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'early', 'start': 38.516, 'end': 38.806, 'confidence': 0.99, 'punctuated_word': 'early'}, {'word': 'fusion', 'start': 38.806, 'end': 39.256, 'confidence': 0.99, 'punctuated_word': 'fusion'}, {'word': 'for', 'start': 39.386, 'end': 39.546, 'confidence': 0.99, 'punctuated_word': 'for'}, {'word': 'handling', 'start': 39.546, 'end': 39.936, 'confidence': 0.99, 'punctuated_word': 'handling'}, {'word': 'text,', 'start': 39.936, 'end': 40.266, 'confidence': 0.99, 'punctuated_word': 'text,'}, {'word': 'images,', 'start': 40.386, 'end': 40.766, 'confidence': 0.99, 'punctuated_word': 'images,'}, {'word': 'and', 'start': 40.766, 'end': 40.906, 'confidence': 0.99, 'punctuated_word': 'and'}, {'word': 'video', 'start': 40.906, 'end': 41.226, 'confidence': 0.99, 'punctuated_word': 'video'}, {'word': 'seamlessly.', 'start': 41.226, 'end': 41.756, 'confidence': 0.99, 'punctuated_word': 'seamlessly.'}, {'word': 'The', 'start': 41.966, 'end': 42.106, 'confidence': 0.99, 'punctuated_word': 'The'}, {'word': 'best', 'start': 42.106, 'end': 42.376, 'confidence': 0.99, 'punctuated_word': 'best'}, {'word': 'part?', 'start': 42.376, 'end': 42.706, 'confidence': 0.99, 'punctuated_word': 'part?'}, {'word': "It's", 'start': 42.926, 'end': 43.126, 'confidence': 0.99, 'punctuated_word': "It's"}, {'word': 'open', 'start': 43.226, 'end': 43.476, 'confidence': 0.99, 'punctuated_word': 'open'}, {'word': 'source.', 'start': 43.476, 'end': 43.876, 'confidence': 0.99, 'punctuated_word': 'source.'}, {'word': 'You', 'start': 44.086, 'end': 44.236, 'confidence': 0.99, 'punctuated_word': 'You'}, {'word': 'can', 'start': 44.236, 'end': 44.406, 'confidence': 0.99, 'punctuated_word': 'can'}, {'word': 'download', 'start': 44.406, 'end': 44.776, 'confidence': 0.99, 'punctuated_word': 'download'}, {'word': 'it', 'start': 44.776, 'end': 44.876, 'confidence': 0.99, 'punctuated_word': 'it'}, {'word': 'now', 'start': 44.876, 'end': 45.086, 'confidence': 0.99, 'punctuated_word': 'now'}, {'word': 'from', 'start': 45.086, 'end': 45.306, 'confidence': 0.99, 'punctuated_word': 'from'}, {'word': 'llama.com', 'start': 45.386, 'end': 46.016, 'confidence': 0.96, 'punctuated_word': 'llama.com'}, {'word': 'or', 'start': 46.186, 'end': 46.336, 'confidence': 0.99, 'punctuated_word': 'or'}, {'word': 'try', 'start': 46.336, 'end': 46.576, 'confidence': 0.99, 'punctuated_word': 'try'}, {'word': 'it', 'start': 46.576, 'end': 46.696, 'confidence': 0.99, 'punctuated_word': 'it'}, {'word': 'on', 'start': 46.696, 'end': 46.836, 'confidence': 0.99, 'punctuated_word': 'on'}, {'word': "Meta's", 'start': 46.916, 'end': 47.286, 'confidence': 0.99, 'punctuated_word': "Meta's"}, {'word': 'platforms.', 'start': 47.286, 'end': 47.826, 'confidence': 0.99, 'punctuated_word': 'platforms.'}, {'word': 'Ready', 'start': 48.066, 'end': 48.356, 'confidence': 0.99, 'punctuated_word': 'Ready'}, {'word': 'to', 'start': 48.356, 'end': 48.456, 'confidence': 0.99, 'punctuated_word': 'to'}, {'word': 'build', 'start': 48.456, 'end': 48.706, 'confidence': 0.99, 'punctuated_word': 'build'}, {'word': 'something', 'start': 48.706, 'end': 49.036, 'confidence': 0.99, 'punctuated_word': 'something'}, {'word': 'amazing', 'start': 49.086, 'end': 49.496, 'confidence': 0.99, 'punctuated_word': 'amazing'}, {'word': 'with', 'start': 49.496, 'end': 49.686, 'confidence': 0.99, 'punctuated_word': 'with'}, {'word': 'Llama', 'start': 49.686, 'end': 49.956, 'confidence': 0.97, 'punctuated_word': 'Llama'}, {'word': '4?', 'start': 49.956, 'end': 50.166, 'confidence': 0.97, 'punctuated_word': '4?'}, {'word': 'Let', 'start': 50.296, 'end': 50.476, 'confidence': 0.99, 'punctuated_word': 'Let'}, {'word': 'me', 'start': 50.476, 'end': 50.596, 'confidence': 0.99, 'punctuated_word': 'me'}, {'word': 'know', 'start': 50.596, 'end': 50.826, 'confidence': 0.99, 'punctuated_word': 'know'}, {'word': 'in', 'start': 50.826, 'end': 50.946, 'confidence': 0.99, 'punctuated_word': 'in'}, {'word': 'the', 'start': 50.946, 'end': 51.046, 'confidence': 0.99, 'punctuated_word': 'the'}, {'word': 'comments.', 'start': 51.046, 'end': 51.536, 'confidence': 0.99, 'punctuated_word': 'comments.'}], 'images_manifest': [{'start': '00:00', 'duration': '00:05', 'text': "Hey tech enthusiasts, guess what? Meta just dropped Llama 4, and wow, it's a game changer.", 'url': 'assets/images/1.jpg', 'source_url': 'https://storage.googleapis.com/gweb-uniblog-publish-prod/images/final_2.5_blog_1.original.jpg', 'search_term': 'Gemini 2.5 Pro performance comparison vertical high quality'}, {'start': '00:05', 'duration': '00:05', 'text': "They've released two initial models, Scout and Maverick. Scout runs on a single H100 GPU,", 'url': 'assets/images/2.jpg', 'source_url': 'https://hindiimages.etnownews.com/thumb/msid-151357040,width-1280,height-720,resizemode-75/151357040.jpg', 'search_term': 'Llama 4 models Scout Maverick vertical high quality'}, {'start': '00:10', 'duration': '00:06', 'text': 'but packs a punch with 17 billion active parameters and get this, a context window of 10 million tokens.', 'url': 'assets/images/3.jpg', 'source_url': 'https://storage.googleapis.com/gweb-uniblog-publish-prod/images/final_2.5_blog_1.original.jpg', 'search_term': 'Gemini 2.5 Pro architecture diagram vertical high quality'}, {'start': '00:16', 'duration': '00:07', 'text': "That's insane for document processing. Maverick is the multilingual beast with 400 billion total parameters, supporting 12 languages,", 'url': 'assets/images/4.jpg', 'source_url': 'https://www.solulab.com/wp-content/uploads/2024/09/Large-Language-Models-1024x569.jpg', 'search_term': 'Multilingual language model comparison chart vertical high quality'}, {'start': '00:23', 'duration': '00:04', 'text': "and amazing multimodal abilities. But here's the juicy part.", 'url': 'assets/images/5.jpg', 'source_url': 'https://storage.googleapis.com/gweb-uniblog-publish-prod/images/final_2.5_blog_1.original.jpg', 'search_term': 'Gemini 2.5 Pro multimodal capabilities vertical high quality'}, {'start': '00:27', 'duration': '00:05', 'text': "They're still training the most powerful version called Behemoth, with a mind-blowing two trillion parameters.", 'url': 'assets/images/6.jpg', 'source_url': 'https://dev.ua/storage/images/82/46/01/64/derived/48bb05f2ea86adc73e3732723a34dd86.jpg', 'search_term': 'Llama 4 Behemoth architecture vertical high quality'}, {'start': '00:32', 'duration': '00:05', 'text': 'Can you imagine what that will do? What makes Llama 4 special? It uses a mixture of experts architecture', 'url': 'assets/images/7.jpg', 'source_url': 'https://storage.googleapis.com/gweb-research2023-media/original_images/ba5144968824a01adef53b4223fb6378-image2.jpg', 'search_term': 'Mixture of Experts architecture diagram vertical high quality'}, {'start': '00:37', 'duration': '00:04', 'text': 'and early fusion for handling text, images, and video seamlessly.', 'url': 'assets/images/8.jpg', 'source_url': 'https://www.researchgate.net/publication/337643039/figure/fig3/AS:855222037536770@1580912231658/a-Early-fusion-video-and-audio-features-are-concatenated-and-used-to-train-an-SVR-b.jpg', 'search_term': 'early fusion text image video vertical high quality'}, {'start': '00:41', 'duration': '00:04', 'text': "The best part? It's open source. You can download it now from llama.com", 'url': 'assets/images/9.jpg', 'source_url': 'https://cdn.arstechnica.net/wp-content/uploads/2024/07/lama405b_hero_3.jpg', 'search_term': 'Llama 4 open source download vertical high quality'}, {'start': '00:45', 'duration': '00:06', 'text': "or try it on Meta's platforms. Ready to build something amazing with Llama 4? Let me know in the comments.", 'url': 'assets/images/10.jpg', 'source_url': 'https://pbs.twimg.com/media/GnzCofAbcAAVkQm.jpg', 'search_term': 'Meta Llama 4 architecture diagram vertical high quality'}], 'bg_music_path': 'assets/audios/bg_music3.mp3'}
+    # Sample state captured from a full agent run, kept next to this module
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "state.json"), encoding="utf-8") as f:
+        state = json.load(f)
     result = create_video_with_overlays(state)
     print(result)
\ No newline at end of file
@@ -1,79 +1,170 @@
 import os
-import json
-from groq import Groq
-from datetime import timedelta
+import orjson
+import math
+import hashlib
+import asyncio
+import numpy as np
+from functools import lru_cache
+from types import SimpleNamespace
+from groq import Groq, AsyncGroq
 
 def format_time(seconds):
     """Convert seconds to MM:SS format"""
-    time_obj = timedelta(seconds=seconds)
-    minutes, seconds = divmod(time_obj.seconds, 60)
+    minutes, seconds = divmod(int(seconds), 60)
     return f"{minutes:02d}:{seconds:02d}"
 
+@lru_cache(maxsize=1)
+def get_client():
+    """Return a shared Groq client so repeated transcriptions reuse its connection pool"""
+    return Groq()
+
+# Whisper request options shared by the sync and async transcription paths
+TRANSCRIPTION_OPTIONS = {
+    "model": "whisper-large-v3-turbo",
+    "prompt": "Specify context or spelling",
+    "response_format": "verbose_json",
+    "language": "en",
+    "temperature": 0.0
+}
+
+# Whisper results are kept here by a hash of the audio contents and request options
+TRANSCRIPTION_CACHE_DIR = "output/transcriptions/cache"
+
+def transcription_cache_path(audio_path):
+    """Return the cache file for an audio file, keyed by a BLAKE2 hash of its contents and the Whisper options"""
+    digest = hashlib.blake2b(orjson.dumps(TRANSCRIPTION_OPTIONS, option=orjson.OPT_SORT_KEYS))
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return os.path.join(TRANSCRIPTION_CACHE_DIR, f"{digest.hexdigest()}.json")
+
+def load_cached_transcription(cache_path):
+    """Return the cached transcription segments and duration, or None if this audio was never transcribed"""
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path, "rb") as f:
+        return SimpleNamespace(**orjson.loads(f.read()))
+
+def save_cached_transcription(cache_path, transcription):
+    """Store the parts of a transcription the video script is built from"""
+    os.makedirs(TRANSCRIPTION_CACHE_DIR, exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a truncated cache entry
+    temp_path = f"{cache_path}.part"
+    with open(temp_path, "wb") as f:
+        f.write(orjson.dumps({"segments": transcription.segments, "duration": transcription.duration}))
+    os.replace(temp_path, cache_path)
+
 def process_transcription(audio_path):
     """Process transcription data into the desired video script format"""
 
-    # Initialize the Groq client
-    client = Groq()
-    with open(audio_path, "rb") as file:
-        transcription = client.audio.transcriptions.create(
-            file=(audio_path, file.read()),
-            model="whisper-large-v3-turbo",
-            prompt="Specify context or spelling",
-            response_format="verbose_json",
-            language="en",
-            temperature=0.0
-        )
+    # Skip the API call entirely if this exact audio was transcribed before
+    cache_path = transcription_cache_path(audio_path)
+    transcription = load_cached_transcription(cache_path)
+    if transcription is None:
+        # Reuse the shared Groq client
+        client = get_client()
+        with open(audio_path, "rb") as file:
+            transcription = client.audio.transcriptions.create(
+                file=(os.path.basename(audio_path), file),  # Let the SDK stream the upload from disk
+                **TRANSCRIPTION_OPTIONS
+            )
+        save_cached_transcription(cache_path, transcription)
+    
+    return build_video_script(transcription)
+
+async def transcribe_async(client, audio_path, semaphore):
+    """Transcribe one file with the async client and build its video script off the event loop"""
+    cache_path = transcription_cache_path(audio_path)
+    transcription = load_cached_transcription(cache_path)
+    if transcription is None:
+        async with semaphore:
+            with open(audio_path, "rb") as file:
+                transcription = await client.audio.transcriptions.create(
+                    file=(os.path.basename(audio_path), file),
+                    **TRANSCRIPTION_OPTIONS
+                )
+        save_cached_transcription(cache_path, transcription)
+    
+    # Merge segments on a worker thread so other uploads keep progressing meanwhile
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, build_video_script, transcription)
+
+async def process_transcriptions(audio_paths, max_concurrency=8):
+    """Transcribe several audio files concurrently, returning their video scripts in input order"""
+    client = AsyncGroq()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(transcribe_async(client, audio_path, semaphore) for audio_path in audio_paths))
+
+# Extra cost per squared second a group falls short of the minimum, so short groups only appear when unavoidable
+SHORT_GROUP_PENALTY = 100
+
+def group_segments(starts, ends, min_duration=4, max_duration=7, target_duration=5.5):
+    """Return the index of the first segment of each group, choosing the grouping whose durations
+    stay closest to target_duration while keeping every group within min_duration and max_duration"""
+    count = len(starts)
+    starts = starts.tolist()
+    ends = ends.tolist()
+    
+    # best_cost[j] is the cheapest grouping of the first j segments, best_start[j] where its last group begins
+    best_cost = [0.0] + [math.inf] * count
+    best_start = [0] * (count + 1)
     
+    for j in range(1, count + 1):
+        group_end = ends[j - 1]
+        
+        # Try every group ending at segment j - 1, longest last; durations only grow as the group reaches back
+        for i in range(j - 1, -1, -1):
+            duration = group_end - starts[i]
+            # A single segment longer than max_duration still has to form its own group
+            if duration > max_duration and i < j - 1:
+                break
+            
+            cost = best_cost[i] + (duration - target_duration) ** 2
+            if duration < min_duration:
+                cost += SHORT_GROUP_PENALTY * (min_duration - duration) ** 2
+            
+            if cost < best_cost[j]:
+                best_cost[j] = cost
+                best_start[j] = i
+    
+    # Walk the back pointers from the end to recover where each group starts
+    group_starts = []
+    j = count
+    while j > 0:
+        j = best_start[j]
+        group_starts.append(j)
+    
+    return group_starts[::-1]
+
+def build_video_script(transcription):
+    """Combine Whisper segments into 4-7 second video script entries"""
 
     # Extract segments from the transcription
     segments = transcription.segments
     total_duration = transcription.duration
     
-    # Initialize variables for combining segments
-    video_script = []
-    current_segment = {
-        "start": format_time(segments[0]["start"]),
-        "text": segments[0]["text"].strip(),
-        "start_seconds": segments[0]["start"],
-        "end_seconds": segments[0]["end"]
-    }
+    # Load segment timings and stripped texts once instead of reading them back out of the dicts per step
+    count = len(segments)
+    starts = np.fromiter((segment["start"] for segment in segments), dtype=np.float64, count=count)
+    ends = np.fromiter((segment["end"] for segment in segments), dtype=np.float64, count=count)
+    texts = [segment["text"].strip() for segment in segments]
     
-    # Combine segments to achieve 4-7 second durations
-    for i in range(1, len(segments)):
-        segment = segments[i]
-        segment_duration = current_segment["end_seconds"] - current_segment["start_seconds"]
-        
-        # If adding this segment keeps us within the 4-7 second range, combine it
-        if segment["end"] - current_segment["start_seconds"] <= 7:
-            current_segment["text"] += " " + segment["text"].strip()
-            current_segment["end_seconds"] = segment["end"]
-        else:
-            # Finalize the current segment and start a new one
-            current_segment["duration"] = format_time(current_segment["end_seconds"] - current_segment["start_seconds"])
-            # Remove the temporary keys used for calculation
-            final_segment = {
-                "start": current_segment["start"],
-                "duration": current_segment["duration"],
-                "text": current_segment["text"]
-            }
-            video_script.append(final_segment)
-            
-            # Start a new segment
-            current_segment = {
-                "start": format_time(segment["start"]),
-                "text": segment["text"].strip(),
-                "start_seconds": segment["start"],
-                "end_seconds": segment["end"]
-            }
-    
-    # Add the last segment
-    current_segment["duration"] = format_time(current_segment["end_seconds"] - current_segment["start_seconds"])
-    final_segment = {
-        "start": current_segment["start"],
-        "duration": current_segment["duration"],
-        "text": current_segment["text"]
-    }
-    video_script.append(final_segment)
+    # Combine segments into groups of 4-7 seconds, as close to 5.5 seconds as the timings allow
+    group_starts = group_segments(starts, ends)
+    group_ends = group_starts[1:] + [count]
+    
+    # Build every entry from its group's first and last segment in one pass
+    first = np.array(group_starts)
+    last = np.array(group_ends) - 1
+    durations = ends[last] - starts[first]
+    video_script = [
+        {
+            "start": format_time(start),
+            "duration": format_time(duration),
+            "text": " ".join(texts[group_start:group_end])
+        }
+        for start, duration, group_start, group_end in zip(starts[first], durations, group_starts, group_ends)
+    ]
     
     # Create the final output structure
     output = {
@@ -85,31 +176,21 @@ def process_transcription(audio_path):
 
 # Main execution
 def main():
-    # Initialize the Groq client
-    client = Groq()
-    
     # Specify the path to the audio file
     filename = "output/output.mp3"  # Replace with your audio file path
     
-    with open(filename, "rb") as file:
-        transcription = client.audio.transcriptions.create(
-            file=(filename, file.read()),
-            model="whisper-large-v3-turbo",
-            prompt="Specify context or spelling",
-            response_format="verbose_json",
-            language="en",
-            temperature=0.0
-        )
-    
-    # Process the transcription into the desired format
+    # Transcribe once and process the transcription into the desired format
     formatted_output = process_transcription(filename)
     
+    # Serialize once with orjson and reuse the bytes for printing and saving
+    formatted_json = orjson.dumps(formatted_output, option=orjson.OPT_INDENT_2)
+    
     # Print the formatted output
-    print(json.dumps(formatted_output, indent=4))
+    print(formatted_json.decode("utf-8"))
     
     # Optionally, save to a file
-    with open("formatted_transcription.json", "w") as f:
-        json.dump(formatted_output, f, indent=4)
+    with open("formatted_transcription.json", "wb") as f:
+        f.write(formatted_json)
     
     print(f"Formatted transcription saved to formatted_transcription.json")
 
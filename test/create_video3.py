@@ -1,13 +1,18 @@
 import os
 import numpy as np
 from datetime import datetime
+from functools import lru_cache
 from moviepy.editor import (
-    VideoFileClip, TextClip, CompositeVideoClip, ColorClip, ImageClip
+    VideoFileClip, VideoClip, CompositeVideoClip, ColorClip, ImageClip
 )
+from moviepy.config import get_setting
+import subprocess
+from PIL import Image, ImageDraw, ImageFont
 import matplotlib.font_manager as fm
 import re
 import random
 
+@lru_cache(maxsize=512)
 def timestamp_to_seconds(timestamp: str) -> float:
     parts = timestamp.split(":")
     if len(parts) == 2:  # MM:SS format
@@ -22,6 +27,7 @@ def timestamp_to_seconds(timestamp: str) -> float:
         except ValueError:
             raise ValueError(f"Invalid timestamp format: {timestamp}")
 
+@lru_cache(maxsize=2)
 def get_system_font(bold=False) -> str:
     """Return a suitable system font path for text overlays.
     
@@ -51,8 +57,10 @@ def get_system_font(bold=False) -> str:
     ]
     
     # Try to find specifically bold fonts in system fonts
-    system_fonts = fm.findSystemFonts()
+    # (enumerating system fonts is slow, so it only happens after the candidate paths are missing)
+    system_fonts = None
     if bold:
+        system_fonts = fm.findSystemFonts()
         for font in system_fonts:
             font_lower = font.lower()
             if 'bold' in font_lower and ('arial' in font_lower or 'helvetica' in font_lower or 'sf-pro' in font_lower):
@@ -64,154 +72,154 @@ def get_system_font(bold=False) -> str:
             return font
     
     # Fall back to any system font
+    if system_fonts is None:
+        system_fonts = fm.findSystemFonts()
     if system_fonts:
         return system_fonts[0]
     
     raise ValueError("No suitable font found on the system")
 
-def split_text_into_words(text):
-    """Split text into words while preserving punctuation."""
-    # This pattern keeps punctuation attached to words
-    words = re.findall(r'\b[\w\']+\b|[.,!?;:…]', text)
-    # Filter out empty strings
-    return [word for word in words if word.strip()]
+# Words and standalone punctuation marks, compiled once for every caption
+WORD_PATTERN = re.compile(r'\b[\w\']+\b|[.,!?;:…]')
+
+# Semi-transparent blue rectangle drawn behind the captions
+CAPTION_RECT_COLOR = np.array([0, 102, 204], dtype=np.float32)
+CAPTION_RECT_OPACITY = 0.7
+
+@lru_cache(maxsize=8)
+def caption_rect(rect_width, rect_height):
+    """Return the rectangle's frame and mask, shared by every caption of the same size."""
+    # Captions only vary by line count, so a handful of sizes covers a whole video
+    rect_frame = np.full((rect_height, rect_width, 3), CAPTION_RECT_COLOR * CAPTION_RECT_OPACITY, dtype=np.float32)
+    rect_mask = np.full((rect_height, rect_width), CAPTION_RECT_OPACITY, dtype=np.float32)
+    # Read-only because the same arrays are handed to every caption
+    rect_frame.flags.writeable = False
+    rect_mask.flags.writeable = False
+    return rect_frame, rect_mask
+
+@lru_cache(maxsize=8)
+def load_caption_font(font_path, fontsize):
+    """Load a caption font once; every segment uses the same font and size."""
+    return ImageFont.truetype(font_path, fontsize)
+
+def layout_caption_lines(text, font, max_width):
+    """Wrap text at spaces to max_width, returning (start, end, x, width) per line with x centering it."""
+    lines = []
+    line_start = line_end = None
+    for match in re.finditer(r'\S+', text):
+        if line_start is not None and font.getlength(text[line_start:match.end()]) > max_width:
+            lines.append((line_start, line_end))
+            line_start = None
+        if line_start is None:
+            line_start = match.start()
+        line_end = match.end()
+    if line_start is not None:
+        lines.append((line_start, line_end))
+    
+    layout = []
+    for start, end in lines:
+        line_width = font.getlength(text[start:end])
+        layout.append((start, end, (max_width - line_width) / 2, line_width))
+    return layout
 
 def create_word_highlight_clips(text, width, duration, start_time, fontsize, font_path):
-    """Create a sequence of clips with word-by-word highlighting with rectangular background."""
-    words = split_text_into_words(text)
+    """Create a clip that highlights the text word by word over a rectangular background."""
+    # Walk the text once to find where each word ends; highlight state i shows text[:reveal_lengths[i]]
+    reveal_lengths = [match.end() for match in WORD_PATTERN.finditer(text) if match.group().strip()]
     
     # Handle empty text case
-    if len(words) == 0:
+    if len(reveal_lengths) == 0:
         return []
     
     speed_factor = 1.1  # Lower value means faster highlighting
-    time_per_word = (duration * speed_factor) / len(words)
-    
-    # Calculate dimensions for our text
-    dummy_text_clip = TextClip(
-        text, 
-        fontsize=fontsize, 
-        color='white', 
-        font=font_path, 
-        method='caption',
-        align='center',
-        size=(width - 80, None)
-    )
-    
-    # Create a background with padding
-    padding_v = 40  # Vertical padding
-    padding_h = 40  # Horizontal padding
-    bg_width = dummy_text_clip.w + padding_h * 2
-    bg_height = dummy_text_clip.h + padding_v * 2
-    
-    highlight_clips = []
-    current_words = []
-    
-    # Create a series of clips with progressively highlighted words
-    for i, word in enumerate(words):
-        current_words.append(word)
-        
-        # Join words with appropriate spacing
-        highlighted_text = ""
-        original_index = 0
-        
-        for j, highlighted_word in enumerate(current_words):
-            # Find the actual position of this word in the original text
-            if j == 0:
-                highlighted_index = text.find(highlighted_word, original_index)
-                original_index = highlighted_index
-            else:
-                # For subsequent words, start search from after previous word
-                highlighted_index = text.find(highlighted_word, original_index)
-                original_index = highlighted_index
-            
-            # If not the first word and there's space before it in the original text
-            if j > 0 and highlighted_index > 0 and text[highlighted_index-1].isspace():
-                highlighted_text += " "
-            
-            highlighted_text += highlighted_word
-            original_index += len(highlighted_word)
-        
-        # First, create a text clip to get its dimensions
-        text_clip = TextClip(
-            highlighted_text, 
-            fontsize=fontsize, 
-            color='white', 
-            font=font_path, 
-            method='caption',
-            align='center',
-            size=(width - 80, None)
-        )
-        
-        # Create a background rectangle clip with a bit of padding
-        rect_padding = 10  # Padding around text
-        rect_width = text_clip.w + (rect_padding * 2)
-        rect_height = text_clip.h + (rect_padding * 2)
-        
-        # Create colored rectangle background (semi-transparent blue)
-        rect_clip = ColorClip(
-            size=(rect_width, rect_height),
-            color=(0, 102, 204)  # RGB blue color
-        ).set_opacity(0.7)  # Make it semi-transparent
-        
-        # Position the text over the rectangle
-        text_on_rect = CompositeVideoClip([
-            rect_clip,
-            text_clip.set_position(("center", "center"))
-        ])
-        
-        # Calculate timing for this highlight
-        word_start_time = start_time + (i * time_per_word)
-        word_duration = time_per_word
-        
-        # Set timing for the highlighted text with background
-        word_highlight = text_on_rect.set_start(word_start_time).set_duration(word_duration)
-        
-        highlight_clips.append(word_highlight)
-    
-    # Add a final clip that keeps the last highlighted state until the end of the segment
-    if current_words:
-        # For the final state, we need to recreate the composite clip
-        final_text_clip = TextClip(
-            highlighted_text, 
-            fontsize=fontsize, 
-            color='white', 
-            font=font_path, 
-            method='caption',
-            align='center',
-            size=(width - 80, None)
-        )
-        
-        rect_width = final_text_clip.w + (rect_padding * 2)
-        rect_height = final_text_clip.h + (rect_padding * 2)
-        
-        final_rect_clip = ColorClip(
-            size=(rect_width, rect_height),
-            color=(0, 102, 204)
-        ).set_opacity(0.7)
-        
-        final_composite = CompositeVideoClip([
-            final_rect_clip,
-            final_text_clip.set_position(("center", "center"))
-        ])
-        
-        final_duration = duration - (len(words) * time_per_word)
-        if final_duration > 0:  # Only add if there's time remaining
-            final_highlight = final_composite.set_start(
-                start_time + len(words) * time_per_word
-            ).set_duration(final_duration)
-            
-            highlight_clips.append(final_highlight)
-    
-    return highlight_clips
+    time_per_word = (duration * speed_factor) / len(reveal_lengths)
+    
+    # Every highlight state is a prefix of the text, so lay the whole text out once
+    font = load_caption_font(font_path, fontsize)
+    max_width = width - 80
+    lines = layout_caption_lines(text, font, max_width)
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    
+    # Render the text once as an alpha map, with a bit of padding for the rectangle around it
+    rect_padding = 10  # Padding around text
+    text_width = max(max_width, int(np.ceil(max(line[3] for line in lines))))
+    rect_width = text_width + (rect_padding * 2)
+    rect_height = line_height * len(lines) + (rect_padding * 2)
+    text_mask = Image.new("L", (rect_width, rect_height), 0)
+    draw = ImageDraw.Draw(text_mask)
+    for index, (start, end, x, line_width) in enumerate(lines):
+        draw.text((rect_padding + x + (text_width - max_width) / 2, rect_padding + index * line_height),
+                  text[start:end], font=font, fill=255)
+    text_alpha = np.asarray(text_mask, dtype=np.float32)[..., None] / 255
+    
+    # White text over the semi-transparent rectangle, and the rectangle alone for text not yet highlighted
+    rect_frame, rect_mask = caption_rect(rect_width, rect_height)
+    text_frame = text_alpha * 255 + (1 - text_alpha) * rect_frame
+    text_mask = text_alpha[..., 0] + (1 - text_alpha[..., 0]) * CAPTION_RECT_OPACITY
+    
+    # For each highlight state, the rows of every visible line and how far across it is revealed
+    reveal_bands = []
+    for reveal_length in reveal_lengths:
+        bands = []
+        for index, (start, end, x, line_width) in enumerate(lines):
+            if start >= reveal_length:
+                break
+            visible_width = font.getlength(text[start:min(end, reveal_length)])
+            y0 = rect_padding + index * line_height
+            x1 = int(np.ceil(rect_padding + x + (text_width - max_width) / 2 + visible_width))
+            bands.append((y0, y0 + line_height, min(x1, rect_width)))
+        reveal_bands.append(bands)
+    
+    def reveal_state(t):
+        return min(int(t / time_per_word), len(reveal_lengths) - 1)
+    
+    def make_frame(t):
+        frame = rect_frame.copy()
+        for y0, y1, x1 in reveal_bands[reveal_state(t)]:
+            frame[y0:y1, :x1] = text_frame[y0:y1, :x1]
+        return frame
+    
+    def make_mask_frame(t):
+        mask = rect_mask.copy()
+        for y0, y1, x1 in reveal_bands[reveal_state(t)]:
+            mask[y0:y1, :x1] = text_mask[y0:y1, :x1]
+        return mask
+    
+    # One clip reveals the pre-rendered text a word at a time, holding the last state until the end
+    highlight_duration = max(duration, len(reveal_lengths) * time_per_word)
+    highlight_clip = VideoClip(make_frame, duration=highlight_duration)
+    highlight_clip.mask = VideoClip(make_mask_frame, ismask=True, duration=highlight_duration)
+    
+    return [highlight_clip.set_start(start_time)]
+
+def load_scaled_image(image, max_width, max_height):
+    """Load an image file (or an already decoded array) as an RGB array scaled to fit inside max_width x max_height."""
+    with (Image.fromarray(image) if isinstance(image, np.ndarray) else Image.open(image)) as img:
+        # Use the smaller scaling factor to ensure the entire image fits
+        scale_factor = min(max_width / img.width, max_height / img.height)
+        new_size = (int(img.width * scale_factor), int(img.height * scale_factor))
+        # Let the JPEG decoder downscale by a power of two first when the image is much larger
+        img.draft("RGB", new_size)
+        img = img.convert("RGB")
+        if img.size != new_size:
+            img = img.resize(new_size, Image.LANCZOS)
+        return np.asarray(img)
 
 def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_height):
     """Create fullscreen image overlays that appear frequently throughout the video,
     ensuring text overlay areas remain visible."""
     image_clips = []
     
-    # Use all segments (including first and last for more coverage)
-    all_segments = images_manifest
+    # Use all segments (including first and last for more coverage) that actually have an image,
+    # so the selection below is made among images that can be shown
+    all_segments = []
+    for segment in images_manifest:
+        # Images already fetched into memory need no file
+        if segment.get("image") is None and not os.path.exists(segment["url"]):
+            print(f"Warning: Image file not found: {segment['url']}")
+            continue
+        all_segments.append(segment)
     
     if not all_segments:
         return image_clips  # Return empty list if no segments
@@ -226,15 +234,13 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
     for idx in selected_indices:
         segment = all_segments[idx]
         
-        # Skip if URL is missing
-        if not os.path.exists(segment["url"]):
-            print(f"Warning: Image file not found: {segment['url']}")
-            continue
+        # Use the image already fetched into memory if there is one, otherwise read it from disk
+        image = segment.get("image")
+        if image is None:
+            image = segment["url"]
         
         # Load the image
         try:
-            img_clip = ImageClip(segment["url"])
-            
             # Calculate start time with a slight offset into the segment
             start_time = timestamp_to_seconds(segment["start"])
             duration = timestamp_to_seconds(segment["duration"])
@@ -251,35 +257,23 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
             # Calculate the available height for the image (subtract text area)
             available_height = shorts_height - text_height_reserve
             
-            # Resize to fit within the available screen area while showing the entire image
-            width_scale = shorts_width / img_clip.w
-            height_scale = available_height / img_clip.h
-            
-            # Use the smaller scaling factor to ensure the entire image fits
-            scale_factor = min(width_scale, height_scale)
-            
-            # Resize the image
-            img_clip = img_clip.resize(scale_factor)
+            # Resize once with PIL to fit the available screen area while showing the entire image
+            img_array = load_scaled_image(image, shorts_width, available_height)
+            img_height, img_width = img_array.shape[:2]
             
             # Center the image horizontally, but position at the top
-            x_center = (shorts_width - img_clip.w) / 2
+            x_center = (shorts_width - img_width) / 2
             
-            # Create a partial background just for the image area if needed
-            # (only if image doesn't fill the available width)
-            if img_clip.w < shorts_width:
-                # Create background only for the image area, not the text area
-                img_bg = ColorClip(size=(shorts_width, available_height), color=(0, 0, 0))
-                img_bg = img_bg.set_duration(img_duration)
-                img_bg = img_bg.set_position((0, 0))  # Position at the top
-                
-                # Add image on top of the background
-                positioned_img = CompositeVideoClip([
-                    img_bg,
-                    img_clip.set_position((x_center, 0))  # Position at the top
-                ])
+            # Black out the rest of the image area if the image doesn't fill the width
+            # (the avatar video sits underneath), padding once here instead of compositing a background every frame
+            if img_width < shorts_width:
+                padded = np.zeros((available_height, shorts_width, 3), dtype=np.uint8)
+                left = int(x_center)
+                padded[:img_height, left:left + img_width] = img_array
+                positioned_img = ImageClip(padded).set_position((0, 0))  # Position at the top
             else:
                 # Image fills the width, no need for additional background
-                positioned_img = img_clip.set_position((x_center, 0))  # Position at the top
+                positioned_img = ImageClip(img_array).set_position((x_center, 0))  # Position at the top
             
             # Set timing without any fade effects
             positioned_img = (positioned_img
@@ -293,6 +287,48 @@ def create_image_overlays(images_manifest, video_duration, shorts_width, shorts_
     
     return image_clips
 
+@lru_cache(maxsize=1)
+def nvenc_available():
+    """Return True if MoviePy's ffmpeg build includes the NVENC H.264 encoder.
+    The probe runs once, the first time a video is encoded, rather than at import."""
+    try:
+        result = subprocess.run(
+            [get_setting("FFMPEG_BINARY"), "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return "h264_nvenc" in result.stdout
+
+def write_final_video(composite, output_path):
+    """Encode the composite with NVENC when ffmpeg supports it, else with a fast libx264 preset."""
+    if nvenc_available():
+        try:
+            composite.write_videofile(
+                output_path,
+                fps=24,
+                codec='h264_nvenc',
+                audio_codec='aac',
+                threads=os.cpu_count(),
+                # MoviePy only adds yuv420p for libx264, so NVENC needs it explicitly
+                ffmpeg_params=['-preset', 'p4', '-rc', 'vbr', '-cq', '23', '-pix_fmt', 'yuv420p']
+            )
+            return
+        except (IOError, OSError) as e:
+            # The encoder can be compiled in without a usable device (e.g. no NVIDIA GPU)
+            print(f"Warning: h264_nvenc encoding failed, falling back to libx264: {e}")
+    
+    composite.write_videofile(
+        output_path, 
+        fps=24, 
+        codec='libx264', 
+        audio_codec='aac',
+        threads=os.cpu_count(),
+        # Trade x264 compression effort for speed and hold quality with CRF
+        preset='ultrafast',
+        ffmpeg_params=['-crf', '23']
+    )
+
 def create_video_with_overlays(state):
     print("Adding text and image overlays to existing video...")
     print(f"State: {state}")
@@ -305,66 +341,61 @@ def create_video_with_overlays(state):
     if "images_manifest" not in state:
         raise ValueError("images_manifest is required in state")
     
-    # Load the existing video (which already has audio)
+    # Define YouTube Shorts dimensions
+    shorts_width, shorts_height = 1080, 1920
+    
+    # Load the existing video (which already has audio), letting ffmpeg scale it to the Shorts width
+    # while decoding; a None height keeps the aspect ratio
     try:
-        original_video = VideoFileClip(state["video_path"])
+        original_video = VideoFileClip(state["video_path"], target_resolution=(None, shorts_width))
         video_duration = original_video.duration
-        original_width, original_height = original_video.size
     except Exception as e:
         raise ValueError(f"Error loading video from {state['video_path']}: {str(e)}")
     
-    # Define YouTube Shorts dimensions
-    shorts_width, shorts_height = 1080, 1920
-    
     # Create a black background for the Shorts format
     background = ColorClip(size=(shorts_width, shorts_height), color=(0, 0, 0))
     background = background.set_duration(video_duration)
     
-    # Calculate the scaling factor to maximize the video size while maintaining aspect ratio
-    scale_factor = shorts_width / original_width
-    
-    # Resize the video while maintaining aspect ratio
-    resized_video = original_video.resize(scale_factor)
-    
-    # Get the new dimensions after resizing
-    new_width, new_height = resized_video.size
+    # The decoded frames already have the resized dimensions
+    new_width, new_height = original_video.size
     
     # Calculate position to center the resized video
     x_center = (shorts_width - new_width) // 2
     y_center = (shorts_height - new_height) // 2
     
     # Position the resized video in the center of the frame
-    positioned_resized_video = resized_video.set_position((x_center, y_center))
+    positioned_resized_video = original_video.set_position((x_center, y_center))
     
     font_path = get_system_font(bold=True)
     fontsize = 60
     
     text_overlays = []
     
-    # Create text overlays with word-by-word highlighting
-    for seg in state["script"]["videoScript"]:
+    # Validate every segment before rendering any captions
+    segments = state["script"]["videoScript"]
+    for seg in segments:
         if not seg.get("text") or not seg.get("start") or not seg.get("duration"):
             raise ValueError(f"Invalid script segment: {seg}")
-        
-        start_time = timestamp_to_seconds(seg["start"])
-        duration = timestamp_to_seconds(seg["duration"])
-        text = seg["text"]
-        
-        # Create word-by-word highlight clips
-        word_clips = create_word_highlight_clips(
-            text=text,
+    
+    # Create text overlays with word-by-word highlighting; each segment's text is rendered once with PIL
+    segment_clips = [
+        create_word_highlight_clips(
+            text=seg["text"],
             width=shorts_width,
-            duration=duration,
-            start_time=start_time,
+            duration=timestamp_to_seconds(seg["duration"]),
+            start_time=timestamp_to_seconds(seg["start"]),
             fontsize=fontsize,
             font_path=font_path
         )
-        
-        # Position each clip at the bottom of the screen
-        bottom_margin = 150  # Margin from the bottom in pixels
-        
-        # Add all word highlight clips to overlays
-        for clip in word_clips:
+        for seg in segments
+    ]
+    
+    # Position each clip at the bottom of the screen
+    bottom_margin = 150  # Margin from the bottom in pixels
+    
+    # Add all word highlight clips to overlays, keeping the script order
+    for clips in segment_clips:
+        for clip in clips:
             # Position at the bottom of the screen
             clip_height = clip.h
             positioned_clip = clip.set_position(("center", shorts_height - clip_height - bottom_margin))
@@ -394,12 +425,7 @@ def create_video_with_overlays(state):
     output_path = os.path.join(output_dir, f"shorts_with_overlays_{datetime.now().timestamp()}.mp4")
     
     # Write the final video
-    composite.write_videofile(
-        output_path, 
-        fps=24, 
-        codec='libx264', 
-        audio_codec='aac'
-    )
+    write_final_video(composite, output_path)
     
     # Close the video files to release resources
     original_video.close()
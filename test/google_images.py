@@ -1,28 +1,37 @@
 import os
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
+import numpy as np
+from io import BytesIO
+from PIL import Image
+from bs4 import BeautifulSoup, SoupStrainer
+
+# One session for every request, so repeat requests to the same host reuse their connections
+session = requests.Session()
+# Use a common User-Agent header to mimic a real browser
+session.headers["User-Agent"] = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                                 "AppleWebKit/537.36 (KHTML, like Gecko) "
+                                 "Chrome/103.0.5060.114 Safari/537.36")
+# Keep enough pooled connections per host for the concurrent downloads
+adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+session.mount("http://", adapter)
+session.mount("https://", adapter)
 
 def fetch_image_urls(query, num_images=5):
     # Prepare keywords for URL encoding
     query_for_url = query.replace(" ", "+")
     url = f"https://www.google.com/search?q={query_for_url}&tbm=isch"
     
-    # Use a common User-Agent header to mimic a real browser
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/103.0.5060.114 Safari/537.36")
-    }
-    
     # Fetch the search result page
-    response = requests.get(url, headers=headers)
+    response = session.get(url, timeout=10)
     if response.status_code != 200:
         print(f"Request failed with status code {response.status_code}")
         return []
     
-    # Parse the page using BeautifulSoup
-    soup = BeautifulSoup(response.text, "html.parser")
+    # Parse the page using BeautifulSoup, only building tree nodes for the <img> tags we read
+    soup = BeautifulSoup(response.text, "html.parser", parse_only=SoupStrainer("img"))
     image_urls = []
     
     # First approach: look for <img> tags with src containing http
@@ -43,27 +52,45 @@ def fetch_image_urls(query, num_images=5):
                 break
     return image_urls[:num_images]
 
+def download_image(idx, img_url, output_dir):
+    try:
+        # Stream the body straight to disk instead of holding the whole image in memory
+        with session.get(img_url, timeout=10, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True  # Undo any gzip/deflate transfer encoding while copying
+            file_path = os.path.join(output_dir, f"image_{idx+1}.jpg")
+            with open(file_path, "wb") as f:
+                shutil.copyfileobj(r.raw, f)
+        print(f"Downloaded image {idx+1} to {file_path}")
+    except Exception as e:
+        print(f"Failed to download image {idx+1} from {img_url}. Error: {e}")
+
+def fetch_image_array(img_url):
+    try:
+        r = session.get(img_url, timeout=10)
+        r.raise_for_status()
+        # Decode straight from the response bytes, without a round trip through a file
+        with Image.open(BytesIO(r.content)) as img:
+            return np.asarray(img.convert("RGB"))
+    except Exception as e:
+        print(f"Failed to fetch image from {img_url}. Error: {e}")
+        return None
+
+def fetch_images_as_arrays(urls):
+    """Fetch images into RGB arrays in memory, with None for any image that failed"""
+    # Downloads are network bound, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(fetch_image_array, urls))
+
 def download_images(urls, output_dir="output"):
     # Create the output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/103.0.5060.114 Safari/537.36")
-    }
-    
-    for idx, img_url in enumerate(urls):
-        try:
-            r = requests.get(img_url, headers=headers, timeout=10)
-            r.raise_for_status()
-            file_path = os.path.join(output_dir, f"image_{idx+1}.jpg")
-            with open(file_path, "wb") as f:
-                f.write(r.content)
-            print(f"Downloaded image {idx+1} to {file_path}")
-        except Exception as e:
-            print(f"Failed to download image {idx+1} from {img_url}. Error: {e}")
+    # Downloads are network bound, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for idx, img_url in enumerate(urls):
+            executor.submit(download_image, idx, img_url, output_dir)
 
 if __name__ == "__main__":
     search_query = input("Enter search query: ")
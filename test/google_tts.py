@@ -1,13 +1,21 @@
 from google.cloud import texttospeech
 import os
 import json
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
-def text_to_speech(text, output_filename):
+@lru_cache(maxsize=1)
+def get_client():
+    """Return a shared TTS client so every synthesis reuses one gRPC channel"""
     # Set the path to your service account key file
     os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "secrets/gcp_tts_key.json"
     
     # Initialize the client
-    client = texttospeech.TextToSpeechClient()
+    return texttospeech.TextToSpeechClient()
+
+def text_to_speech(text, output_filename):
+    # Reuse the shared client
+    client = get_client()
     
     # Set the text input
     synthesis_input = texttospeech.SynthesisInput(text=text)
@@ -37,6 +45,15 @@ def text_to_speech(text, output_filename):
         out.write(response.audio_content)
         print(f"Audio content written to file: {output_filename}")
 
+def text_to_speech_batch(texts, output_filenames, max_workers=4):
+    """Synthesize several texts concurrently over the shared client"""
+    # Create the client up front so the worker threads don't race to build their own
+    get_client()
+    
+    # gRPC channels are thread-safe, so the requests overlap their network round trips
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(text_to_speech, texts, output_filenames))
+
 # Example usage
 if __name__ == "__main__":
     text = """Arrey yaar! Oh my god, aaj kya hua, tu believe nahi karega! 
@@ -1,11 +1,29 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
 import os
+import shutil
 from dotenv import load_dotenv
 import time
 
 load_dotenv()
 
+# Shared HTTP session so the API call and the video downloads reuse pooled connections,
+# retrying idempotent requests on transient gateway errors
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+def save_video_response(video_response, output_file_path):
+    # Copy the raw stream to disk in 1 MiB blocks, decoding any transfer encoding on the way
+    video_response.raw.decode_content = True
+    with open(output_file_path, "wb") as video_file:
+        shutil.copyfileobj(video_response.raw, video_file, length=1024 * 1024)
+
 def generate_avatar_video(audio_file_path):
     api_key = os.getenv("SIMLI_API_KEY")
     face_id = "ba22033f-210a-41e3-b539-c1742f6ffeab"
@@ -34,7 +52,7 @@ def generate_avatar_video(audio_file_path):
 
     # Make the POST request
     try:
-        response = requests.post(url, json=payload)
+        response = session.post(url, json=payload)
         response.raise_for_status()  # Raise an error for HTTP codes 4xx/5xx
     except requests.exceptions.RequestException as e:
         print(f"Error making API request: {e}")
@@ -61,15 +79,13 @@ def generate_avatar_video(audio_file_path):
         }
         
         print(f"Attempting to download from URL: {mp4_url}")
-        video_response = requests.get(mp4_url, stream=True, headers=headers)
+        video_response = session.get(mp4_url, stream=True, headers=headers)
         video_response.raise_for_status()  # Raise an error for HTTP codes 4xx/5xx
 
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
         
-        with open(output_file_path, "wb") as video_file:
-            for chunk in video_response.iter_content(chunk_size=8192):
-                video_file.write(chunk)
+        save_video_response(video_response, output_file_path)
                 
         print(f"Avatar video saved successfully to: {output_file_path}")
     except Exception as e:
@@ -86,12 +102,10 @@ def generate_avatar_video(audio_file_path):
                 time.sleep(retry_delay)
                 
                 # Try again
-                video_response = requests.get(mp4_url, stream=True, headers=headers)
+                video_response = session.get(mp4_url, stream=True, headers=headers)
                 video_response.raise_for_status()
                 
-                with open(output_file_path, "wb") as video_file:
-                    for chunk in video_response.iter_content(chunk_size=8192):
-                        video_file.write(chunk)
+                save_video_response(video_response, output_file_path)
                         
                 print(f"Avatar video saved successfully on retry {retry} to: {output_file_path}")
                 break  # Exit the retry loop if successful